@@ -0,0 +1,46 @@
+"""
+Memory footprint of the bounded caches under millions of distinct users.
+
+Compares a plain dict (what dm_cache / rate_limit used before) with TTLCache.
+Needs the bot's environment (.env) like the bot itself.
+
+    python -m benchmarks.cache_memory [users] [maxsize]
+"""
+import json
+import sys
+import tracemalloc
+
+from src.utils.cache import TTLCache
+
+
+def measure(cache, users: int, samples: int = 10) -> list:
+    """Insert `users` distinct ids and record traced memory at regular steps"""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    step = max(users // samples, 1)
+    points = []
+    for user_id in range(users):
+        cache[user_id] = True
+        if (user_id + 1) % step == 0:
+            points.append({"users": user_id + 1, "bytes": tracemalloc.get_traced_memory()[0] - base})
+    tracemalloc.stop()
+    return points
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    maxsize = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    cache = TTLCache(maxsize=maxsize, ttl=600)
+    result = {
+        "users": users,
+        "maxsize": maxsize,
+        "dict": measure({}, users),
+        "ttl_cache": measure(cache, users),
+        "ttl_cache_stats": cache.stats(),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: routing cost per callback query as the number of routes grows.
+
+Compares a chain of per-handler filters.regex checks (how pyrogram picks a
+handler) with the route-table lookup in src.dispatch, for a callback whose
+route was registered last.
+Needs the bot's environment (.env) like the bot itself.
+
+    python -m benchmarks.dispatch [updates]
+"""
+import asyncio
+import json
+import sys
+import time
+
+from pyrogram import filters
+from pyrogram.types import CallbackQuery, User
+
+from src.dispatch import Router
+from src.utils.callbacks import callback_data, parse_callback_data
+
+
+async def handler(client, update, *args):
+    pass
+
+
+def query(data: str) -> CallbackQuery:
+    return CallbackQuery(id="1", from_user=User(id=1), chat_instance="0", data=data)
+
+
+async def regex_chain(routes: int, updates: int) -> float:
+    chain = [filters.regex(rf"^route{i}_(\d+)_([a-f0-9]{{8}})$") for i in range(routes)]
+    update = query(f"route{routes - 1}_3_0a1b2c3d")
+    started = time.perf_counter()
+    for _ in range(updates):
+        for flt in chain:
+            if await flt(None, update):
+                await handler(None, update)
+                break
+    return (time.perf_counter() - started) / updates * 1e6
+
+
+async def route_table(routes: int, updates: int) -> float:
+    router = Router("callback")
+    for i in range(routes):
+        router.on(f"route{i}")(handler)
+    update = query(callback_data(f"route{routes - 1}", 3, "0a1b2c3d"))
+    started = time.perf_counter()
+    for _ in range(updates):
+        name, args = parse_callback_data(update.data)
+        await router.dispatch(None, update, name, *args)
+    return (time.perf_counter() - started) / updates * 1e6
+
+
+async def main():
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    results = []
+    for routes in (5, 50, 500):
+        results.append({
+            "routes": routes,
+            "us_per_update": {
+                "regex_chain": await regex_chain(routes, updates),
+                "route_table": await route_table(routes, updates),
+            },
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,181 @@
+"""
+In-process stand-in for the parts of the Telegram client the handlers use.
+
+FakeTelegram answers send_message, edit_message_text, copy_message,
+delete_messages, get_users, get_chat_member and answer_callback_query after
+a simulated round trip, can inject FloodWait errors (slept through outside the
+outbox, like pyrogram does below its sleep_threshold), and routes messages and
+edits through an Outbox exactly like Bot does. feed() hands an update to the
+handlers registered on `app`, running their real filters in group order.
+"""
+import asyncio
+import itertools
+import random
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from datetime import datetime
+
+import pyrogram
+from pyrogram.enums import ChatType, ChatMemberStatus, ParseMode
+from pyrogram.errors import FloodWait
+from pyrogram.handlers import MessageHandler, CallbackQueryHandler
+from pyrogram.types import User, Chat, Message, CallbackQuery, ChatMember
+
+from src.utils.outbox import outbox_call
+
+# User action an API call is made for; set by the load driver around each update
+action = ContextVar("action", default="other")
+
+BOT_ID = 1
+
+
+class FakeTelegram:
+    def __init__(self, app, latency: float = 0.05, jitter: float = 0.02,
+                 flood_rate: float = 0.0, flood_seconds: int = 1, outbox=None, seed: int = 0):
+        self.app = app
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_rate = flood_rate
+        self.flood_seconds = flood_seconds
+        self.outbox = outbox
+        self.rng = random.Random(seed)
+
+        self.parse_mode = ParseMode.DEFAULT
+        self.me = User(id=BOT_ID, is_bot=True, first_name="Chitti", username="chitti_load_bot", client=self)
+        self.id = self.me.id
+        self.name = self.me.first_name
+        self.username = self.me.username
+
+        self.calls = Counter()                      # method -> API calls
+        self.calls_by_action = defaultdict(Counter) # action -> method -> API calls
+        self.floodwaits = 0
+        self.errors = Counter()                     # exception name -> handler errors
+        self.keyboards = {}                         # user_id -> last message with buttons sent to them
+        self.users = {}
+        self._chats = {}
+        self._ids = itertools.count(1)
+
+    # --- objects ---
+
+    def user(self, user_id: int, first_name: str = None) -> User:
+        if user_id not in self.users:
+            self.users[user_id] = User(
+                id=user_id, is_bot=False, first_name=first_name or f"user{user_id}", client=self
+            )
+        return self.users[user_id]
+
+    def chat(self, chat_id: int) -> Chat:
+        if chat_id not in self._chats:
+            if chat_id > 0:
+                self._chats[chat_id] = Chat(id=chat_id, type=ChatType.PRIVATE, client=self)
+            else:
+                self._chats[chat_id] = Chat(id=chat_id, type=ChatType.SUPERGROUP, title=f"chat{chat_id}", client=self)
+        return self._chats[chat_id]
+
+    def message(self, chat_id: int, from_user: User, text: str, reply_markup=None) -> Message:
+        return Message(
+            id=next(self._ids), chat=self.chat(chat_id), from_user=from_user, text=text,
+            date=datetime.now(), reply_markup=reply_markup, client=self
+        )
+
+    def callback_query(self, from_user: User, message: Message, data: str) -> CallbackQuery:
+        return CallbackQuery(
+            id=str(next(self._ids)), from_user=from_user, chat_instance="0",
+            message=message, data=data, client=self
+        )
+
+    # --- updates ---
+
+    async def feed(self, update):
+        """Run an update through the handlers registered on the app, like the dispatcher"""
+        handler_type = CallbackQueryHandler if isinstance(update, CallbackQuery) else MessageHandler
+        try:
+            for group in list(self.app.dispatcher.groups.values()):
+                for handler in group:
+                    if not isinstance(handler, handler_type) or not await handler.check(self, update):
+                        continue
+                    try:
+                        await handler.callback(self, update)
+                    except pyrogram.ContinuePropagation:
+                        continue
+                    except pyrogram.StopPropagation:
+                        raise
+                    except Exception as ex:
+                        # The dispatcher logs and swallows handler errors
+                        self.errors[type(ex).__name__] += 1
+                    break
+        except pyrogram.StopPropagation:
+            pass
+
+    def get_listener_matching_with_data(self, data, listener_type):
+        return None     # no conversation listeners (client.listen) in the bot
+
+    # --- API ---
+
+    async def _api(self, method: str, tag: str):
+        self.calls[method] += 1
+        self.calls_by_action[tag][method] += 1
+        await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+        while self.flood_rate and self.rng.random() < self.flood_rate:
+            self.floodwaits += 1
+            if outbox_call.get() or self.flood_seconds > self.app.sleep_threshold:
+                raise FloodWait(value=self.flood_seconds)
+            # Like pyrogram, calls outside the outbox sleep through short waits
+            await asyncio.sleep(self.flood_seconds)
+
+    async def _submit(self, chat_id, call, priority):
+        if self.outbox is None:
+            return await call()
+        return await self.outbox.submit(chat_id, call, priority)
+
+    async def send_message(self, chat_id, text: str = None, *, priority=None, reply_markup=None, **kwargs):
+        tag = action.get()
+
+        async def call():
+            await self._api("send_message", tag)
+            message = self.message(chat_id, self.me, text, reply_markup)
+            if reply_markup is not None and chat_id > 0:
+                self.keyboards[chat_id] = message
+            return message
+
+        return await self._submit(chat_id, call, priority)
+
+    async def edit_message_text(self, chat_id, message_id: int = None, text: str = None, *,
+                                priority=None, reply_markup=None, **kwargs):
+        tag = action.get()
+
+        async def call():
+            await self._api("edit_message_text", tag)
+            sent = self.keyboards.get(chat_id)
+            if reply_markup is None and sent is not None and sent.id == message_id:
+                del self.keyboards[chat_id]
+            return self.message(chat_id, self.me, text, reply_markup)
+
+        return await self._submit(chat_id, call, priority)
+
+    async def copy_message(self, chat_id, from_chat_id, message_id, *, priority=None, **kwargs):
+        tag = action.get()
+
+        async def call():
+            await self._api("copy_message", tag)
+            return self.message(chat_id, self.me, "")
+
+        return await self._submit(chat_id, call, priority)
+
+    async def delete_messages(self, chat_id, message_ids, revoke: bool = True):
+        await self._api("delete_messages", action.get())
+        return 1
+
+    async def answer_callback_query(self, callback_query_id, text: str = None, show_alert: bool = None, **kwargs):
+        await self._api("answer_callback_query", action.get())
+        return True
+
+    async def get_users(self, user_ids):
+        await self._api("get_users", action.get())
+        if isinstance(user_ids, (list, tuple, set)):
+            return [self.user(user_id) for user_id in user_ids]
+        return self.user(user_ids)
+
+    async def get_chat_member(self, chat_id, user_id):
+        await self._api("get_chat_member", action.get())
+        return ChatMember(status=ChatMemberStatus.MEMBER, user=self.user(user_id), client=self)
@@ -0,0 +1,154 @@
+"""
+Microbenchmark: the shipped ChittiGame/Hand code paths against the previous
+list-of-emoji hands.
+
+Dealing and a single pass cost more with Hand (it counts cards into a
+bytearray, and remove/add are method calls). check_win and cached keyboards
+are where it pays off; an uncached keyboard and the bytes per hand are about
+the same as before.
+
+Needs the bot's environment (.env) like the bot itself.
+
+    python -m benchmarks.hands [players] [repeat]
+"""
+import json
+import random
+import re
+import sys
+import timeit
+
+from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import CARD_ITEMS
+from src.utils.callbacks import parse_callback_data
+from src.utils.game import ChittiGame, render_card_buttons
+
+GAME_HASH = "0123abcd"
+LIST_CALLBACK = re.compile(r"^pass_(\d+)_([a-f0-9]{8})$")    # the old pass handler's filter
+
+
+# --- previous list implementation, kept here as the baseline ---
+
+def list_deal(n):
+    deck = []
+    for item in CARD_ITEMS[:n]:
+        deck.extend([item] * n)
+    random.shuffle(deck)
+    hands = []
+    for _ in range(n):
+        hands.append(deck[:n])
+        deck = deck[n:]
+    return hands
+
+
+def list_pass(hand, other, card_index):
+    card = CARD_ITEMS[card_index]
+    if card in hand:
+        hand.remove(card)
+        other.append(card)
+
+
+def list_check_win(hand):
+    return all(card == hand[0] for card in hand)
+
+
+def list_parse(data):
+    match = LIST_CALLBACK.match(data)
+    return int(match.group(1)), match.group(2)
+
+
+def list_buttons(hand):
+    unique_cards = sorted(set(hand), key=lambda x: CARD_ITEMS.index(x))
+    buttons, row = [], []
+    for i, card in enumerate(unique_cards):
+        row.append(InlineKeyboardButton(
+            text=f"{card} ×{hand.count(card)}",
+            callback_data=f"pass_{CARD_ITEMS.index(card)}_{GAME_HASH}"
+        ))
+        if len(row) == 2 or i == len(unique_cards) - 1:
+            buttons.append(row)
+            row = []
+    return InlineKeyboardMarkup(buttons)
+
+
+# --- shipped implementation: ChittiGame with Hand, versioned callback data ---
+
+def new_game(players: int) -> ChittiGame:
+    game = ChittiGame(host_id=1, chat_id=-1)
+    for user_id in range(1, players + 1):
+        game.add_player(user_id, f"user{user_id}")
+    return game
+
+
+def game_deal(game):
+    game._create_deck()
+    game._deal_cards()
+
+
+def per_call_ns(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    random.seed(0)
+
+    lists = list_deal(players)
+    game = new_game(players)
+    game_deal(game)
+    # check_win of a set hand would lock the player, so time a mixed one
+    player_id = next(user_id for user_id, hand in game.player_hands.items() if not hand.is_set)
+    hand, other = game.player_hands[player_id], game.player_hands[player_id % players + 1]
+    card = next(iter(hand))
+    list_card = lists[0][0]
+    counts = bytes(hand.counts)
+    list_data = list_buttons(lists[0]).inline_keyboard[0][0].callback_data
+    hand_data = render_card_buttons(counts, game.game_hash).inline_keyboard[0][0].callback_data
+
+    def list_pass_back_and_forth():
+        list_pass(lists[0], lists[1], CARD_ITEMS.index(list_card))
+        list_pass(lists[1], lists[0], CARD_ITEMS.index(list_card))
+
+    def hand_pass_back_and_forth():
+        # The hand updates ChittiGame.pass_card makes, without its turn checks
+        for giver, taker in ((hand, other), (other, hand)):
+            if card in giver:
+                giver.remove(card)
+                taker.add(card)
+
+    result = {
+        "players": players,
+        "ns_per_op": {
+            "deal": {
+                "list": per_call_ns(lambda: list_deal(players), number // 10),
+                "hand": per_call_ns(lambda: game_deal(game), number // 10),
+            },
+            "pass_x2": {
+                "list": per_call_ns(list_pass_back_and_forth, number),
+                "hand": per_call_ns(hand_pass_back_and_forth, number),
+            },
+            "check_win": {
+                "list": per_call_ns(lambda: list_check_win(lists[0]), number),
+                "hand": per_call_ns(lambda: game.check_win(player_id), number),
+            },
+            "keyboard": {
+                "list": per_call_ns(lambda: list_buttons(lists[0]), number // 10),
+                "hand": per_call_ns(lambda: render_card_buttons(counts, game.game_hash), number // 10),
+                "hand_cached": per_call_ns(lambda: game.get_card_buttons(player_id), number),
+            },
+            "callback_parse": {
+                "list": per_call_ns(lambda: list_parse(list_data), number),
+                "hand": per_call_ns(lambda: parse_callback_data(hand_data), number),
+            },
+        },
+        "bytes_per_hand": {
+            "list": sys.getsizeof(lists[0]),
+            "hand": sys.getsizeof(hand) + sys.getsizeof(hand.counts),
+        },
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: per-turn cost of rendering the card keyboard.
+
+Records the hand shown on every turn of simulated games, then renders the same
+sequence with the old list-of-emoji code, the uncached renderer and the
+memoised get_card_buttons (a blocked player or /lock renders a hand twice, so
+`repeat` renders each hand more than once).
+Needs the bot's environment (.env) like the bot itself.
+
+    python -m benchmarks.keyboards [games] [repeat]
+"""
+import json
+import random
+import sys
+import time
+
+from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import CARD_ITEMS
+from src.utils import game as game_module
+from src.utils.game import render_card_buttons
+from src.utils.hand import Hand
+from benchmarks.simulate import Simulator, greedy_policy
+
+
+def legacy_buttons(hand, game_hash):
+    """get_card_buttons before hands were count vectors"""
+    unique_cards = sorted(set(hand), key=lambda x: CARD_ITEMS.index(x))
+    buttons, row = [], []
+    for i, card in enumerate(unique_cards):
+        row.append(InlineKeyboardButton(
+            text=f"{card} ×{hand.count(card)}",
+            callback_data=f"pass_{CARD_ITEMS.index(card)}_{game_hash}"
+        ))
+        if len(row) == 2 or i == len(unique_cards) - 1:
+            buttons.append(row)
+            row = []
+    return InlineKeyboardMarkup(buttons)
+
+
+def record_turns(games: int):
+    """(game, player id, hand counts) for every turn of greedy games"""
+    sim = Simulator(greedy_policy, seed=1)
+    turns = []
+    original = sim.timed
+
+    def timed(name, func, *args):
+        if name == "get_card_buttons":
+            game, player_id = func.__self__, args[0]
+            turns.append((game, player_id, bytes(game.player_hands[player_id].counts)))
+        return original(name, func, *args)
+
+    sim.timed = timed
+    for number in range(games):
+        sim.play(-(number + 1), random.randint(4, 8))
+    return turns
+
+
+def measure(turns, repeat, render) -> float:
+    started = time.perf_counter()
+    for item in turns:
+        for _ in range(repeat):
+            render(*item)
+    return (time.perf_counter() - started) / len(turns) * 1e6
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    random.seed(0)
+    turns = record_turns(games)
+
+    as_lists = [(list(Hand.from_counts(counts)), game.game_hash) for game, _, counts in turns]
+    legacy = measure(as_lists, repeat, lambda cards, game_hash: legacy_buttons([CARD_ITEMS[c] for c in cards], game_hash))
+    uncached = measure(turns, repeat, lambda game, _, counts: render_card_buttons(counts, game.game_hash))
+
+    # Replay the recorded hands through the memoised path
+    game_module._keyboards.clear()
+    hands = [(game, player_id, Hand.from_counts(counts)) for game, player_id, counts in turns]
+
+    def cached(game, player_id, hand):
+        game.player_hands[player_id] = hand
+        return game.get_card_buttons(player_id)
+
+    memoised = measure(hands, repeat, cached)
+
+    print(json.dumps({
+        "turns": len(turns),
+        "renders_per_turn": repeat,
+        "us_per_turn": {"legacy": legacy, "uncached": uncached, "memoised": memoised},
+        "cache": game_module._keyboards.stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
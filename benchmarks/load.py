@@ -0,0 +1,185 @@
+"""
+End-to-end load test: hundreds of chats playing through the real handlers
+against FakeTelegram, with simulated latency and optional FloodWaits.
+
+Every chat runs /game, /join for each player, /begin, then the player whose
+turn it is presses the button of their rarest card (or sends /lock once they
+hold a set) until the game ends. Prints a JSON result with API calls per turn
+and per action, handler latency per action and event-loop lag.
+Needs the bot's environment (.env) like the bot itself; Mongo isn't used.
+
+    python -m benchmarks.load --chats 200 --latency 0.05 --flood-rate 0.001
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+
+from config import DM_OK_TTL
+from src import app
+from src.modules import load_modules
+from src.utils import game_manager, dm_cache, drain_teardowns, teardown_summary
+from src.utils.outbox import Outbox
+
+from benchmarks.fake_telegram import FakeTelegram, action
+
+load_modules()  # registers every handler on app
+
+
+def percentiles(values) -> dict:
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(len(values) * q))] * 1000
+    return {"count": len(values), "p50_ms": pick(0.50), "p99_ms": pick(0.99), "max_ms": values[-1] * 1000}
+
+
+class LoadTest:
+    def __init__(self, telegram: FakeTelegram, max_turns: int, seed: int):
+        self.telegram = telegram
+        self.max_turns = max_turns
+        self.rng = random.Random(seed)
+        self.latencies = defaultdict(list)     # action -> handler seconds
+        self.turns = 0
+        self.finished = 0
+        self.stuck = 0
+
+    async def send(self, name: str, update):
+        token = action.set(name)
+        started = time.perf_counter()
+        try:
+            await self.telegram.feed(update)
+        finally:
+            self.latencies[name].append(time.perf_counter() - started)
+            action.reset(token)
+
+    def command(self, chat_id, user, text):
+        return self.telegram.message(chat_id, user, text)
+
+    async def play_chat(self, chat_id: int, user_ids):
+        tg = self.telegram
+        users = [tg.user(user_id) for user_id in user_ids]
+        host = users[0]
+
+        await self.send("game", self.command(chat_id, host, "/game"))
+        for user in users:
+            await self.send("join", self.command(chat_id, user, "/join"))
+        await self.send("begin", self.command(chat_id, host, "/begin"))
+
+        turns = 0
+        while turns < self.max_turns:
+            game = game_manager.get_game(chat_id)
+            if game is None:
+                self.finished += 1
+                break
+            current = game.get_current_player()
+            if current is None:
+                break
+            user = tg.user(current.id)
+
+            if game.player_hands[current.id].is_set:
+                await self.send("lock", self.command(current.id, user, "/lock"))
+                continue
+
+            keyboard = tg.keyboards.get(current.id)
+            if keyboard is None:
+                self.stuck += 1
+                break
+            # Keep the card held most: press the button showing the fewest copies
+            buttons = [button for row in keyboard.reply_markup.inline_keyboard for button in row]
+            button = min(buttons, key=lambda b: (int(b.text.rsplit("×", 1)[1]), self.rng.random()))
+            await self.send("pass", tg.callback_query(user, keyboard, button.callback_data))
+            turns += 1
+
+        self.turns += turns
+        if game_manager.get_game(chat_id):
+            game_manager.end_game(chat_id)
+
+
+async def monitor_lag(samples, interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - started - interval)
+
+
+async def run(args) -> dict:
+    await asyncio.sleep(0)  # handler registration runs as tasks on the loop
+
+    outbox = None
+    if not args.no_outbox:
+        outbox = Outbox(rate=args.rate, group_interval=args.group_interval, private_interval=0)
+        outbox.start()
+    telegram = FakeTelegram(
+        app, latency=args.latency, jitter=args.jitter,
+        flood_rate=args.flood_rate, flood_seconds=args.flood_seconds, outbox=outbox, seed=args.seed
+    )
+    test = LoadTest(telegram, args.max_turns, args.seed)
+
+    sizes = random.Random(args.seed)
+    chats = []
+    for index in range(args.chats):
+        players = sizes.randint(4, 8)
+        user_ids = [index * 10 + i + 1 for i in range(players)]
+        for user_id in user_ids:
+            dm_cache.set(user_id, True, ttl=DM_OK_TTL)   # everyone has started the bot
+        chats.append((-1_000_000 - index, user_ids))
+
+    lag = []
+    monitor = asyncio.create_task(monitor_lag(lag))
+    started = time.perf_counter()
+    await asyncio.gather(*(test.play_chat(chat_id, user_ids) for chat_id, user_ids in chats))
+    elapsed = time.perf_counter() - started
+    await drain_teardowns()
+    monitor.cancel()
+    if outbox:
+        await outbox.stop()
+
+    calls = sum(telegram.calls.values())
+    invocations = {name: len(values) for name, values in test.latencies.items()}
+    return {
+        "chats": args.chats,
+        "finished": test.finished,
+        "stuck": test.stuck,
+        "turns": test.turns,
+        "seconds": elapsed,
+        "turns_per_s": test.turns / elapsed,
+        "api_calls": calls,
+        "api_calls_per_turn": calls / test.turns if test.turns else None,
+        "api_calls_by_method": dict(telegram.calls),
+        "api_calls_per_action": {
+            name: sum(telegram.calls_by_action[name].values()) / count
+            for name, count in invocations.items()
+        },
+        "floodwaits": telegram.floodwaits,
+        "handler_errors": dict(telegram.errors),
+        "handler_latency": {name: percentiles(values) for name, values in test.latencies.items()},
+        "event_loop_lag": percentiles(lag),
+        "outbox": outbox.stats() if outbox else None,
+        "teardown": teardown_summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--max-turns", type=int, default=300, help="turns before a chat is given up")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean seconds per API call")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="share of API calls answered with FloodWait")
+    parser.add_argument("--flood-seconds", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=1000, help="outbox messages per second")
+    parser.add_argument("--group-interval", type=float, default=0, help="outbox seconds between messages to a group")
+    parser.add_argument("--no-outbox", action="store_true", help="call the fake API directly")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    result = asyncio.get_event_loop().run_until_complete(run(args))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
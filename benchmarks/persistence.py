@@ -0,0 +1,102 @@
+"""
+Benchmark: game snapshot size, encode/restore time and write amplification.
+
+Plays simulated games in memory and coalesces changes the way snapshot_loop
+does, one checkpoint every `turns_per_checkpoint` turns. Restore time covers
+decoding the BSON documents the driver returns and rebuilding the games; with
+--mongo the snapshots are also written to a scratch database on MONGO_URL and
+recovery is timed end to end (load + rebuild), like restore_games.
+Needs the bot's environment (.env) like the bot itself.
+
+    python -m benchmarks.persistence [games] [players] [turns_per_checkpoint] [--mongo]
+"""
+import asyncio
+import json
+import random
+import sys
+import time
+
+import bson
+
+from config import MONGO_URL
+
+from src.utils.game import ChittiGame
+from src.utils.manager import GameManager
+from src.utils.persistence import collect_snapshots
+
+
+# Scratch database for --mongo, dropped afterwards; never the bot's own
+BENCHMARK_DB = "CricketBotBenchmark"
+
+
+async def mongo_recovery(snapshots) -> float:
+    """Store the snapshots, then time loading and rebuilding them like restore_games"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    collection = AsyncIOMotorClient(MONGO_URL)[BENCHMARK_DB]["games"]
+    await collection.drop()
+    await collection.insert_many(snapshots)
+    try:
+        started = time.perf_counter()
+        docs = await collection.find({}).to_list(length=None)
+        games = [ChittiGame.from_snapshot(doc) for doc in docs]
+        elapsed = time.perf_counter() - started
+        assert len(games) == len(snapshots)
+        return elapsed
+    finally:
+        await collection.drop()
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != "--mongo"]
+    count = int(args[0]) if len(args) > 0 else 10_000
+    players = int(args[1]) if len(args) > 1 else 6
+    per_checkpoint = int(args[2]) if len(args) > 2 else 3
+    random.seed(0)
+
+    manager = GameManager()
+    for chat_id in range(-count, 0):
+        game = manager.create_game(chat_id * 10, chat_id)
+        for user_id in range(players):
+            game.add_player(chat_id * 100 - user_id, f"user{user_id}")
+        game.start_game()
+
+    writes = 0
+    started = time.perf_counter()
+    snapshots, _ = collect_snapshots(manager)
+    encode = time.perf_counter() - started
+    writes += len(snapshots)
+
+    sizes = [len(bson.encode(doc)) for doc in snapshots]
+
+    for turn in range(per_checkpoint * 4):
+        for game in manager.games.values():
+            current = game.get_current_player()
+            hand = game.player_hands[current.id]
+            game.pass_card(current.id, hand.random_card())
+        if (turn + 1) % per_checkpoint == 0:
+            snapshots, _ = collect_snapshots(manager)
+            writes += len(snapshots)
+
+    encoded = [bson.encode(doc) for doc in snapshots]
+    started = time.perf_counter()
+    restored = [ChittiGame.from_snapshot(bson.decode(raw)) for raw in encoded]
+    restore = time.perf_counter() - started
+
+    result = {
+        "games": count,
+        "players": players,
+        "snapshot_bytes": {"avg": sum(sizes) / len(sizes), "max": max(sizes)},
+        "encode_us_per_game": encode / count * 1e6,
+        "restore_us_per_game": restore / len(restored) * 1e6,
+        "state_changes": manager.changes,
+        "snapshot_writes": writes,
+        "write_amplification": writes / manager.changes,
+    }
+    if "--mongo" in sys.argv:
+        result["mongo_recovery_seconds"] = asyncio.run(mongo_recovery(snapshots))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
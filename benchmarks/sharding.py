@@ -0,0 +1,104 @@
+"""
+Benchmark: game throughput with chats sharded over worker processes.
+
+Every process plays the simulated chats it owns (shard_of) to the end with a
+greedy policy, claiming players through one LocalPlayerRegistry shared by all
+processes, the same way workers share the players collection.
+Needs the bot's environment (.env) like the bot itself.
+
+    python -m benchmarks.sharding [chats] [max_workers]
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from src.utils.manager import GameManager
+from src.utils.shard import LocalPlayerRegistry, shard_of
+
+PLAYERS = 6
+MAX_TURNS = 400
+
+
+def play(game) -> int:
+    """Pass the rarest card in hand until one player is left without a set"""
+    turns = 0
+    while len(game.locked_players) < len(game.players) - 1 and turns < MAX_TURNS:
+        current = game.get_current_player()
+        if game.check_win(current.id):
+            continue
+        hand = game.player_hands[current.id]
+        card_id = min(hand.items(), key=lambda item: item[1])[0]
+        game.pass_card(current.id, card_id)
+        turns += 1
+    return turns
+
+
+async def run_shard(chats, workers, index, mapping) -> int:
+    manager = GameManager()
+    manager.registry = LocalPlayerRegistry(mapping)
+    rng = random.Random(index)
+    random.seed(index)
+
+    turns = 0
+    for chat_id in chats:
+        if shard_of(chat_id, workers) != index:
+            continue
+        user_ids = [chat_id * 10 - i for i in range(PLAYERS)]
+        if not all([await manager.claim_player(user_id, chat_id) for user_id in user_ids]):
+            continue
+        game = manager.create_game(user_ids[0], chat_id)
+        for user_id in user_ids:
+            manager.add_player(chat_id, user_id, f"user{rng.randrange(1000)}")
+        game.start_game()
+        turns += play(game)
+        manager.end_game(chat_id)
+        await asyncio.sleep(0)  # let the registry releases run
+    return turns
+
+
+def worker(chats, workers, index, mapping, results):
+    results.put(asyncio.run(run_shard(chats, workers, index, mapping)))
+
+
+def measure(chats, workers, sync) -> dict:
+    mapping = sync.dict()
+    results = sync.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(chats, workers, index, mapping, results))
+        for index in range(workers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    turns = sum(results.get() for _ in processes)
+    return {"workers": workers, "seconds": elapsed, "turns": turns, "turns_per_s": turns / elapsed}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    chats = list(range(-count, 0))
+
+    runs = []
+    with multiprocessing.Manager() as sync:
+        workers = 1
+        while workers <= max_workers:
+            runs.append(measure(chats, workers, sync))
+            workers *= 2
+
+    base = runs[0]["turns_per_s"]
+    for run in runs:
+        run["speedup"] = run["turns_per_s"] / base
+    print(json.dumps({"chats": count, "cpus": os.cpu_count(), "runs": runs}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Headless game simulator and throughput benchmark for the game core.
+
+Plays full games through GameManager/ChittiGame without Telegram, with a
+pluggable policy choosing the card each player passes, and prints a JSON
+result: games/s, turns/s, per-operation latency and bytes per live game.
+Needs the bot's environment (.env) like the bot itself.
+
+    python -m benchmarks.simulate --games 2000 --policy greedy --seed 1
+    python -m benchmarks.simulate --output result.json
+    python -m benchmarks.simulate --compare result.json   # fails on a >10% turns/s drop
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+from src.utils.manager import GameManager
+
+
+# --- policies: (game, player_id, rng) -> card id to pass ---
+
+def random_policy(game, player_id, rng):
+    """Pass any card, with the odds of picking one blindly"""
+    return game.player_hands[player_id].random_card(rng)
+
+
+def greedy_policy(game, player_id, rng):
+    """Keep the card type held most; pass one of the rarest"""
+    items = game.player_hands[player_id].items()
+    fewest = min(count for _, count in items)
+    return rng.choice([card_id for card_id, count in items if count == fewest])
+
+
+def first_button_policy(game, player_id, rng):
+    """Always press the first button of the keyboard"""
+    return game.player_hands[player_id].items()[0][0]
+
+
+POLICIES = {
+    "random": random_policy,
+    "greedy": greedy_policy,
+    "first": first_button_policy,
+}
+
+
+class Simulator:
+    """Drives games the way the handlers do and records how long each call takes"""
+
+    def __init__(self, policy, seed: int = 0, max_turns: int = 2000, distribute: bool = False):
+        self.policy = policy
+        self.rng = random.Random(seed)
+        random.seed(seed)   # the game shuffles and orders turns with the random module
+        self.max_turns = max_turns
+        self.distribute = distribute
+        self.manager = GameManager()
+        self.timings = defaultdict(list)
+        self.turns = 0
+        self.finished = 0
+        self.capped = 0
+
+    def timed(self, name, func, *args):
+        started = time.perf_counter_ns()
+        result = func(*args)
+        self.timings[name].append(time.perf_counter_ns() - started)
+        return result
+
+    def setup(self, chat_id: int, players: int):
+        user_ids = [chat_id * 10 - i for i in range(players)]
+        game = self.timed("create_game", self.manager.create_game, user_ids[0], chat_id)
+        for user_id in user_ids:
+            self.timed("add_player", self.manager.add_player, chat_id, user_id, f"user{user_id}")
+        self.timed("start_game", game.start_game)
+        return game
+
+    def play(self, chat_id: int, players: int):
+        game = self.setup(chat_id, players)
+        turns = 0
+        while len(game.locked_players) < len(game.players) - 1:
+            if turns >= self.max_turns:
+                self.capped += 1
+                break
+
+            current = game.get_current_player()
+            if self.timed("check_win", game.check_win, current.id):
+                if self.distribute:
+                    self.timed("distribute_remaining_cards", game.distribute_remaining_cards, current.id)
+                continue
+
+            self.timed("get_card_buttons", game.get_card_buttons, current.id)
+            card_id = self.policy(game, current.id, self.rng)
+            self.timed("pass_card", game.pass_card, current.id, card_id)
+            turns += 1
+        else:
+            self.finished += 1
+
+        self.turns += turns
+        self.timed("end_game", self.manager.end_game, chat_id)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def bytes_per_live_game(players: int, count: int = 1000) -> float:
+    """Memory held by started games that are still running"""
+    manager = GameManager()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for chat_id in range(-count, 0):
+        game = manager.create_game(chat_id * 10, chat_id)
+        for i in range(players):
+            manager.add_player(chat_id, chat_id * 10 - i, f"user{i}")
+        game.start_game()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename")) / count
+
+
+def run(args) -> dict:
+    sim = Simulator(POLICIES[args.policy], args.seed, args.max_turns, args.distribute)
+    sizes = random.Random(args.seed)
+
+    started = time.perf_counter()
+    for game_number in range(args.games):
+        players = args.players or sizes.randint(4, 8)
+        sim.play(-(game_number + 1), players)
+    elapsed = time.perf_counter() - started
+
+    ops = {}
+    for name, values in sim.timings.items():
+        values.sort()
+        ops[name] = {
+            "count": len(values),
+            "p50_us": percentile(values, 0.50) / 1000,
+            "p99_us": percentile(values, 0.99) / 1000,
+        }
+
+    return {
+        "policy": args.policy,
+        "distribute": args.distribute,
+        "seed": args.seed,
+        "games": args.games,
+        "finished": sim.finished,
+        "capped": sim.capped,
+        "turns": sim.turns,
+        "seconds": elapsed,
+        "games_per_s": args.games / elapsed,
+        "turns_per_s": sim.turns / elapsed,
+        "ops": ops,
+        "bytes_per_live_game": bytes_per_live_game(args.players or 6),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.simulate")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=0, help="players per game (default: random 4-8)")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-turns", type=int, default=2000, help="turns before a game is given up")
+    parser.add_argument("--distribute", action="store_true",
+                        help="hand a locked player's cards on (the handlers don't; games rarely end)")
+    parser.add_argument("--output", help="also write the result to this file")
+    parser.add_argument("--compare", help="earlier result to compare turns/s against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    result = run(args)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        change = result["turns_per_s"] / baseline["turns_per_s"] - 1
+        print(f"turns/s change against {args.compare}: {change:+.1%}", file=sys.stderr)
+        if change < -args.tolerance:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
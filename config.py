@@ -19,4 +19,76 @@ MONGO_URL = getenv("MONGO_URL")
 LOGGER_ID = int(getenv("LOGGER_ID"))
 
 # Game card items
-CARD_ITEMS = ["🍎", "🍉", "🍒", "🍓", "🍊", "🍋", "🍍", "🥝"]
\ No newline at end of file
+CARD_ITEMS = ["🍎", "🍉", "🍒", "🍓", "🍊", "🍋", "🍍", "🥝"]
+
+# Broadcast tuning: parallel senders (pacing and FloodWait retries are the outbox's)
+BROADCAST_CONCURRENCY = int(getenv("BROADCAST_CONCURRENCY", 10))
+# Ids fetched per round trip when streaming broadcast recipients
+RECIPIENT_BATCH_SIZE = int(getenv("RECIPIENT_BATCH_SIZE", 1000))
+
+# Write-behind flushing of new users/chats: batch size and interval (seconds)
+WRITE_BEHIND_BATCH = int(getenv("WRITE_BEHIND_BATCH", 500))
+WRITE_BEHIND_INTERVAL = float(getenv("WRITE_BEHIND_INTERVAL", 5))
+
+# DM reachability cache: seconds a positive/negative answer stays valid, parallel checks
+DM_OK_TTL = int(getenv("DM_OK_TTL", 6 * 60 * 60))
+DM_FAIL_TTL = int(getenv("DM_FAIL_TTL", 5 * 60))
+DM_CHECK_CONCURRENCY = int(getenv("DM_CHECK_CONCURRENCY", 8))
+DM_CACHE_SIZE = int(getenv("DM_CACHE_SIZE", 100_000))
+
+# Upper bounds for the other in-process caches
+RATE_LIMIT_CACHE_SIZE = int(getenv("RATE_LIMIT_CACHE_SIZE", 50_000))
+VOTE_CACHE_SIZE = int(getenv("VOTE_CACHE_SIZE", 10_000))
+KEYBOARD_CACHE_SIZE = int(getenv("KEYBOARD_CACHE_SIZE", 4096))
+# Seconds an unfinished /stop vote is kept
+VOTE_TTL = int(getenv("VOTE_TTL", 60 * 60))
+
+# Outbound scheduler: global messages per second and minimum seconds between
+# requests to the same group / private chat
+OUTBOX_RATE = float(getenv("OUTBOX_RATE", 30))
+OUTBOX_GROUP_INTERVAL = float(getenv("OUTBOX_GROUP_INTERVAL", 1.0))
+OUTBOX_PRIVATE_INTERVAL = float(getenv("OUTBOX_PRIVATE_INTERVAL", 0))
+
+# Seconds game changes are coalesced before their snapshot is written
+SNAPSHOT_DELAY = float(getenv("SNAPSHOT_DELAY", 1.0))
+
+# Updates handled concurrently per process (games are still handled one update at a time)
+HANDLER_WORKERS = int(getenv("HANDLER_WORKERS", 32))
+
+# Seconds a player has for their turn before a card is passed for them (0 disables)
+TURN_TIMEOUT = int(getenv("TURN_TIMEOUT", 120))
+
+# Game limits: lobbies and idle games expire after these many seconds, at most MAX_GAMES live games
+LOBBY_TTL = int(getenv("LOBBY_TTL", 15 * 60))
+GAME_TTL = int(getenv("GAME_TTL", 30 * 60))
+MAX_GAMES = int(getenv("MAX_GAMES", 10_000))
+GOVERNOR_INTERVAL = float(getenv("GOVERNOR_INTERVAL", 60))
+
+# Button edits and game-over DMs sent in parallel when a game ends
+TEARDOWN_CONCURRENCY = int(getenv("TEARDOWN_CONCURRENCY", 8))
+
+# Logging: file (empty disables it), rotation by size or by time ("midnight", "h", ...),
+# "text" or "json" lines, default level and per-module levels ("pyrogram=ERROR,src.dispatch=DEBUG")
+LOG_FILE = getenv("LOG_FILE", "log.txt")
+LOG_MAX_BYTES = int(getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_ROTATE_WHEN = getenv("LOG_ROTATE_WHEN", "")
+LOG_BACKUPS = int(getenv("LOG_BACKUPS", 5))
+LOG_FORMAT = getenv("LOG_FORMAT", "text")
+LOG_LEVEL = getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = getenv("LOG_LEVELS", "")
+
+# Port of the Prometheus /metrics endpoint (0 disables it; worker N listens on port + N)
+METRICS_PORT = int(getenv("METRICS_PORT", 0))
+METRICS_HOST = getenv("METRICS_HOST", "127.0.0.1")
+
+# Handler timing: log a warning above SLOW_HANDLER_MS, and the time of this share of all other calls
+SLOW_HANDLER_MS = float(getenv("SLOW_HANDLER_MS", 1000))
+HANDLER_SAMPLE_RATE = float(getenv("HANDLER_SAMPLE_RATE", 0.001))
+# Lines in the owner's /profile and /memsnap reports
+PROFILE_TOP = int(getenv("PROFILE_TOP", 40))
+
+# Worker processes sharing the load by chat id (python -m src --workers N sets these)
+WORKERS = int(getenv("WORKERS", 1))
+WORKER_INDEX = int(getenv("WORKER_INDEX", 0))
+# Seconds after which a cross-worker player claim expires even if its game never released it
+PLAYER_CLAIM_TTL = int(getenv("PLAYER_CLAIM_TTL", 6 * 60 * 60))
@@ -1,8 +1,12 @@
 import time
+from functools import partial
 from pyrogram import Client
+from pyrogram.errors import FloodWait
 from motor.motor_asyncio import AsyncIOMotorClient
 
 import config
+from src import metrics
+from src.utils.outbox import Outbox, Priority, outbox_call
 
 # MongoDB connection
 db = AsyncIOMotorClient(config.MONGO_URL).Anonymous
@@ -14,14 +18,20 @@ START_TIME = time.time()
 class Bot(Client):
     def __init__(self):
         super().__init__(
-            name="CricketBot",
+            # Each worker needs its own session file
+            name="CricketBot" if config.WORKERS == 1 else f"CricketBot_{config.WORKER_INDEX}",
             api_id=config.API_ID,
             api_hash=config.API_HASH,
             bot_token=config.BOT_TOKEN,
             max_concurrent_transmissions=7,
+            workers=config.HANDLER_WORKERS,
         )
+        # Every outgoing message and edit goes through the outbound scheduler
+        # (the Telegram limits are per bot, so workers split the global rate)
+        self.outbox = Outbox(rate=config.OUTBOX_RATE / config.WORKERS)
 
     async def start(self, *args, **kwargs):
+        self.outbox.start()
         await super().start(*args, **kwargs)
         me = await self.get_me()
         self.id = me.id
@@ -30,7 +40,39 @@ class Bot(Client):
    
 
     async def stop(self, *args, **kwargs):
+        # Queued messages go out (or fail) while the session is still open
+        await self.outbox.stop()
         await super().stop(*args, **kwargs)
+
+    async def invoke(self, query, *args, **kwargs):
+        method = type(query).__name__
+        if outbox_call.get():
+            # The outbox pauses every chat on a FloodWait; other calls keep pyrogram's sleep
+            kwargs["sleep_threshold"] = 0
+        started = time.perf_counter()
+        try:
+            return await super().invoke(query, *args, **kwargs)
+        except FloodWait as fw:
+            metrics.floodwaits.inc(method)
+            metrics.flood_seconds.inc(method, amount=fw.value)
+            raise
+        except Exception as ex:
+            metrics.api_errors.inc(method, type(ex).__name__)
+            raise
+        finally:
+            metrics.api_seconds.observe(time.perf_counter() - started, method)
+
+    async def send_message(self, chat_id, *args, priority: Priority = None, **kwargs):
+        call = partial(super().send_message, chat_id, *args, **kwargs)
+        return await self.outbox.submit(chat_id, call, priority)
+
+    async def edit_message_text(self, chat_id, *args, priority: Priority = None, **kwargs):
+        call = partial(super().edit_message_text, chat_id, *args, **kwargs)
+        return await self.outbox.submit(chat_id, call, priority)
+
+    async def copy_message(self, chat_id, *args, priority: Priority = None, **kwargs):
+        call = partial(super().copy_message, chat_id, *args, **kwargs)
+        return await self.outbox.submit(chat_id, call, priority)
   
 
 
@@ -1,20 +1,93 @@
+import argparse
 import asyncio
-import importlib
+import os
+import subprocess
 import sys
+from time import perf_counter
 
 from pyrogram import idle, errors
 from pyrogram.enums import ChatMemberStatus
 
-from src import app, config
-from src.modules import ALL_MODULES
+from src import app, config, metrics
+from src.dispatch import hold_updates, release_updates, drop_updates
+from src.modules import load_modules
 from src.logging import LOGGER
 
+# Long-running tasks started by on_startup, cancelled on shutdown
+background_tasks = []
+
 
 async def boot():
+    from src.utils import turn_timers
+
     LOGGER(__name__).info("Bot is starting...")
-    await app.start()
+    started = perf_counter()
+    if config.METRICS_PORT:
+        await metrics.timed_phase(
+            "metrics", metrics.start_metrics_server(config.METRICS_PORT + config.WORKER_INDEX, config.METRICS_HOST)
+        )
+
+    # Handlers are registered before connecting, so no update arrives without one
+    phase_started = perf_counter()
+    load_modules()
+    metrics.startup_seconds["modules"] = perf_counter() - phase_started
+
+    # Updates wait (briefly) while games are restored alongside the Telegram login
+    hold_updates()
+    # Both steps run to the end, so a failed one never leaves the other half-started
+    results = await asyncio.gather(
+        metrics.timed_phase("telegram", app.start()),
+        metrics.timed_phase("restore", restore_state()),
+        return_exceptions=True,
+    )
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        LOGGER(__name__).error(f"Startup failed: {type(failures[0]).__name__}")
+        # Updates held during startup would reach a bot that is being torn down
+        drop_updates()
+        await turn_timers.stop()
+        if app.is_connected:
+            await app.stop()
+        await metrics.stop_metrics_server()
+        raise failures[0]
+    release_updates()
     LOGGER(__name__).info("Bot started successfully.")
 
+    # Call on_startup function after everything is loaded
+    ready = await on_startup()
+    metrics.startup_seconds["total"] = perf_counter() - started
+    phases = ", ".join(
+        f"{phase} {seconds:.2f}s" for phase, seconds in metrics.startup_seconds.items() if phase != "total"
+    )
+    LOGGER(__name__).info(f"Startup took {metrics.startup_seconds['total']:.2f}s ({phases})")
+
+    try:
+        if ready:
+            await idle()
+    finally:
+        LOGGER(__name__).warning("Bot is shutting down...")
+        await on_shutdown()
+        await app.stop()
+        await metrics.stop_metrics_server()
+
+
+async def restore_state():
+    """State that updates depend on: the games running before the restart and their turn timers."""
+    from src.database import ensure_player_indexes
+    from src.utils import restore_games, turn_timers, game_manager
+    from src.modules.game import resume_turn_timers
+
+    # Player claims rely on the unique index when several workers share the players
+    if config.WORKERS > 1:
+        await ensure_player_indexes()
+    await restore_games()
+    # Claims a crashed run never released would lock players out of every other group
+    await game_manager.release_stale_claims()
+    turn_timers.start()
+    resume_turn_timers()
+
+
+async def announce_start() -> bool:
     try:
         await app.send_message(
             chat_id=config.LOGGER_ID,
@@ -22,45 +95,95 @@ async def boot():
         )
     except (errors.ChannelInvalid, errors.PeerIdInvalid):
         LOGGER(__name__).error("Bot can't access log group.")
-        return
+        return False
     except Exception as ex:
         LOGGER(__name__).error(f"Failed to send log message: {type(ex).__name__}")
-        return
+        return False
+    return True
 
+
+async def check_admin() -> bool:
     try:
         member = await app.get_chat_member(config.LOGGER_ID, app.id)
         if member.status != ChatMemberStatus.ADMINISTRATOR:
             LOGGER(__name__).error("Bot is not admin in log group.")
-            return
+            return False
     except Exception as ex:
         LOGGER(__name__).error(f"Failed to check admin status: {type(ex).__name__}")
-        return
+        return False
+    return True
 
-    # Load all modules
-    for module in ALL_MODULES:
-        importlib.import_module(f"src.modules.{module}")
 
-    # Call on_startup function after everything is loaded
-    await on_startup()
-
-    try:
-        await idle()
-    finally:
-        LOGGER(__name__).warning("Bot is shutting down...")
-        await app.stop()
-
-
-async def on_startup():
-    """Function called after bot startup to initialize additional tasks."""
-    from src.utils import game_manager
+async def on_startup() -> bool:
+    """Function called after bot startup to initialize additional tasks; False if the bot should stop."""
+    from src.database import ensure_indexes, warm_known_ids, write_behind_loop
+    from src.utils import resume_broadcast, snapshot_loop, governor_loop
 
     LOGGER(__name__).info("Running startup tasks...")
+    background_tasks.append(asyncio.create_task(snapshot_loop()))
+    # Expire idle lobbies and abandoned games so memory stays bounded
+    background_tasks.append(asyncio.create_task(governor_loop(app)))
+    # Known-id warm-up can take a while on big databases; writes are idempotent meanwhile
+    background_tasks.append(asyncio.create_task(metrics.timed_phase("known_ids", warm_known_ids())))
+    background_tasks.append(asyncio.create_task(write_behind_loop()))
+
+    # Independent checks and warm-ups run side by side; handlers are already live
+    log_group, admin, *_ = await asyncio.gather(
+        metrics.timed_phase("log_group", announce_start()),
+        metrics.timed_phase("admin_check", check_admin()),
+        metrics.timed_phase("indexes", ensure_indexes()),
+        # Pick up a broadcast that was interrupted by the last shutdown
+        metrics.timed_phase("broadcast", resume_broadcast(app)),
+    )
     # You can add other startup tasks here if needed
     LOGGER(__name__).info("Startup tasks completed.")
+    return log_group and admin
 
 
-if __name__ == "__main__":
+async def on_shutdown():
+    """Function called before the bot stops to persist pending state."""
+    from src.database import flush_pending
+    from src.utils import checkpoint, turn_timers, drain_teardowns, game_manager
+
+    for task in background_tasks:
+        task.cancel()
+    await turn_timers.stop()
+    # Let games that just ended disable their buttons while the client is still up
+    await drain_teardowns(timeout=10)
+    # Player releases of games that just ended, so nobody stays claimed after the restart
+    await game_manager.drain_releases(timeout=10)
+    await flush_pending()
+    await checkpoint()
+
+
+def run_workers(workers: int):
+    """Run one bot process per worker; each one owns a share of the chats."""
+    LOGGER(__name__).info(f"Starting {workers} workers...")
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "src"],
+            env=dict(os.environ, WORKERS=str(workers), WORKER_INDEX=str(index))
+        )
+        for index in range(workers)
+    ]
     try:
-        asyncio.get_event_loop().run_until_complete(boot())
+        for process in processes:
+            process.wait()
     except KeyboardInterrupt:
-        LOGGER(__name__).warning("Bot interrupted by user or system.")
\ No newline at end of file
+        # Ctrl+C reaches the workers too; let them shut down cleanly
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m src")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    args = parser.parse_args()
+
+    if args.workers > 1 and "WORKER_INDEX" not in os.environ:
+        run_workers(args.workers)
+    else:
+        try:
+            asyncio.get_event_loop().run_until_complete(boot())
+        except KeyboardInterrupt:
+            LOGGER(__name__).warning("Bot interrupted by user or system.")
\ No newline at end of file
@@ -1,8 +1,9 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 import config 
+from src.metrics import MongoMetrics
 
-# Asynchronous Database Connection
-ChatBot = AsyncIOMotorClient(config.MONGO_URL)
+# Asynchronous Database Connection (every command is timed for /metrics)
+ChatBot = AsyncIOMotorClient(config.MONGO_URL, event_listeners=[MongoMetrics()])
 # Database
 db = ChatBot["CricketBot"]
 
@@ -10,6 +11,11 @@ db = ChatBot["CricketBot"]
 usersdb = db["users"] # Users Collection
 chatsdb = db["chats"] # Chats Collection
 games_collection = db["games"] # Game Collection
+broadcastsdb = db["broadcasts"] # Broadcast progress Collection
+playersdb = db["players"] # Player -> game chat Collection, shared by workers
 
 # Importing other modules
 from .chats import *
+from .broadcasts import *
+from .games import *
+from .players import *
@@ -0,0 +1,36 @@
+from . import broadcastsdb
+
+# Only one broadcast runs at a time, so its state lives in a single document
+BROADCAST_ID = "current"
+
+
+async def get_broadcast():
+    """
+    Fetch the unfinished broadcast job, if any.
+    """
+    return await broadcastsdb.find_one({"_id": BROADCAST_ID})
+
+
+async def save_broadcast(job: dict):
+    """
+    Store a new broadcast job, replacing any previous one.
+    """
+    await broadcastsdb.replace_one({"_id": BROADCAST_ID}, {**job, "_id": BROADCAST_ID}, upsert=True)
+
+
+async def update_broadcast(cursor, sent, users, failed):
+    """
+    Persist the progress cursor and counters of the running broadcast.
+    Every recipient id <= cursor has already been handled.
+    """
+    await broadcastsdb.update_one(
+        {"_id": BROADCAST_ID},
+        {"$set": {"cursor": cursor, "sent": sent, "users": users, "failed": failed}}
+    )
+
+
+async def clear_broadcast():
+    """
+    Remove the broadcast job once it has finished.
+    """
+    await broadcastsdb.delete_one({"_id": BROADCAST_ID})
@@ -1,18 +1,84 @@
+import asyncio
+
+from pymongo import UpdateOne, DeleteOne
+from pymongo.errors import OperationFailure
+
+from config import RECIPIENT_BATCH_SIZE, WRITE_BEHIND_BATCH, WRITE_BEHIND_INTERVAL
+from src.logging import LOGGER
 from . import usersdb, chatsdb
 
+# Ids known to be stored, so repeat /start events never reach Mongo
+known_users = set()
+known_chats = set()
+
+# Writes waiting for the next write-behind flush
+_pending_users = {}  # user_id -> username
+_pending_chats = {}  # chat_id -> title
+_removed_chats = set()
+_flush_task = None
+_removed_while_warming = None   # chats removed during warm_known_ids(), which mustn't come back as known
+_flush_lock = asyncio.Lock()    # one flush at a time, so batches are applied in order
+_MISSING = object()
+
+# Mongo error codes: index exists with other options, duplicate key, index not found
+_INDEX_CONFLICTS = (85, 86, 11000)
+_INDEX_NOT_FOUND = 27
+
+# Chat membership ingestion: events seen/ignored by the handler, changes that
+# replaced a pending one for the same chat, and chat writes applied
+membership_stats = {"seen": 0, "ignored": 0, "coalesced": 0, "written": 0}
+
+
+async def _remove_duplicates(collection, field: str) -> int:
+    # Keep the oldest record for each id and delete the others
+    duplicates = []
+    async for group in collection.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": f"${field}", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True):
+        duplicates += group["ids"][1:]
+    if duplicates:
+        await collection.delete_many({"_id": {"$in": duplicates}})
+    return len(duplicates)
+
+
+async def _ensure_unique_index(collection, field: str):
+    try:
+        await collection.create_index(field, unique=True)
+        return
+    except OperationFailure as ex:
+        if ex.code not in _INDEX_CONFLICTS:
+            raise
+
+    # Duplicate ids or an older non-unique index are in the way
+    removed = await _remove_duplicates(collection, field)
+    if removed:
+        LOGGER(__name__).warning(f"Removed {removed} duplicate {field} records from {collection.name}")
+    try:
+        await collection.drop_index(f"{field}_1")
+    except OperationFailure as ex:
+        if ex.code != _INDEX_NOT_FOUND:
+            raise
+    await collection.create_index(field, unique=True)
+
+
+async def ensure_indexes():
+    """
+    Create the unique indexes used by upserts, recipient lookups and streaming.
+    """
+    await _ensure_unique_index(chatsdb, "chat_id")
+    await _ensure_unique_index(usersdb, "user_id")
+
 
 async def get_chats() -> dict:
     """
     Fetch served users and chats from the database.
     Returns a dictionary containing lists of users and chats.
+    Prefer iter_recipients() for large collections.
     """
-    chats = []
-    users = []
-
-    async for chat in chatsdb.find({"chat_id": {"$lt": 0}}):
-        chats.append(chat["chat_id"])
-    async for user in usersdb.find({"user_id": {"$gt": 0}}):
-        users.append(user["user_id"])
+    chats = [chat_id async for chat_id in _iter_ids(chatsdb, "chat_id", {"$lt": 0})]
+    users = [user_id async for user_id in _iter_ids(usersdb, "user_id", {"$gt": 0})]
 
     return {
         "chats": chats,
@@ -20,23 +86,201 @@ async def get_chats() -> dict:
     }
 
 
+async def _iter_ids(collection, field: str, condition: dict, batch_size: int = RECIPIENT_BATCH_SIZE):
+    # Projecting only the indexed field (and dropping _id) lets the index cover the query
+    cursor = collection.find(
+        {field: condition},
+        projection={"_id": 0, field: 1},
+        batch_size=batch_size,
+    ).sort(field, 1)
+    async for doc in cursor:
+        yield doc[field]
+
+
+async def count_recipients(after=None) -> int:
+    """
+    Count the chats and users that iter_recipients() would yield.
+    """
+    chats_from, users_from = _recipient_bounds(after)
+    total = await usersdb.count_documents({"user_id": users_from})
+    if chats_from is not None:
+        total += await chatsdb.count_documents({"chat_id": chats_from})
+    return total
+
+
+def _recipient_bounds(after):
+    # Chat ids are negative and user ids positive, so a single ascending
+    # cursor walks every chat first and then every user.
+    if after is None:
+        return {"$lt": 0}, {"$gt": 0}
+    if after < 0:
+        return {"$gt": after, "$lt": 0}, {"$gt": 0}
+    return None, {"$gt": after}
+
+
+async def iter_recipients(after=None, batch_size: int = RECIPIENT_BATCH_SIZE):
+    """
+    Stream broadcast recipient ids in ascending order: served chats, then users.
+    Only ids greater than `after` are yielded, so a saved cursor resumes the stream.
+    """
+    chats_from, users_from = _recipient_bounds(after)
+    if chats_from is not None:
+        async for chat_id in _iter_ids(chatsdb, "chat_id", chats_from, batch_size):
+            yield chat_id
+    async for user_id in _iter_ids(usersdb, "user_id", users_from, batch_size):
+        yield user_id
+
+
+async def warm_known_ids():
+    """
+    Load every stored user and chat id into memory so add_user/add_chat
+    can skip ids the database already has.
+    """
+    global _removed_while_warming
+    async for user_id in _iter_ids(usersdb, "user_id", {"$gt": 0}):
+        known_users.add(user_id)
+
+    # The cursor may still return a chat that remove_chat() dropped meanwhile
+    _removed_while_warming = set()
+    try:
+        async for chat_id in _iter_ids(chatsdb, "chat_id", {"$lt": 0}):
+            if chat_id not in _removed_while_warming:
+                known_chats.add(chat_id)
+    finally:
+        _removed_while_warming = None
+
+
 async def add_user(user_id, username=None):
     """
     Adds a user to the database if they don't already exist.
+    The write is queued and applied by the write-behind flush.
     """
-    if not await usersdb.find_one({"user_id": user_id}):
-        await usersdb.insert_one({"user_id": user_id, "username": username})
+    if user_id in known_users:
+        return
+    known_users.add(user_id)
+    _pending_users[user_id] = username
+    _maybe_flush()
 
 
 async def add_chat(chat_id, title=None):
     """
     Adds a chat to the database if it doesn't already exist.
+    The write is queued and applied by the write-behind flush.
     """
-    if not await chatsdb.find_one({"chat_id": chat_id}):
-        await chatsdb.insert_one({"chat_id": chat_id, "title": title})
+    if chat_id in known_chats:
+        return
+    if chat_id in _removed_chats:
+        # Removed and added back before the flush: the stored record stays as it is
+        _removed_chats.discard(chat_id)
+        membership_stats["coalesced"] += 1
+    known_chats.add(chat_id)
+    _pending_chats[chat_id] = title
+    _maybe_flush()
 
 async def remove_chat(chat_id):
     """
     Remove a chat from the database when bot leaves or is removed.
+    The delete is queued; only the last add/remove per chat is written.
+    """
+    known_chats.discard(chat_id)
+    if _removed_while_warming is not None:
+        _removed_while_warming.add(chat_id)
+    if _pending_chats.pop(chat_id, _MISSING) is not _MISSING or chat_id in _removed_chats:
+        membership_stats["coalesced"] += 1
+    _removed_chats.add(chat_id)
+    _maybe_flush()
+
+
+async def get_dm_status(user_ids) -> dict:
+    """
+    Fetch stored DM reachability for the given users.
+    Returns {user_id: (reachable, checked_at)} for users that have been checked.
+    """
+    status = {}
+    async for doc in usersdb.find(
+        {"user_id": {"$in": list(user_ids)}, "dm_checked": {"$exists": True}},
+        projection={"_id": 0, "user_id": 1, "dm_ok": 1, "dm_checked": 1},
+    ):
+        status[doc["user_id"]] = (doc["dm_ok"], doc["dm_checked"])
+    return status
+
+
+async def set_dm_status(user_id, reachable: bool, checked_at: float):
+    """
+    Store whether the bot can DM a user next to their user record.
+    """
+    # Take over a queued insert so its username isn't lost to this upsert
+    username = _pending_users.pop(user_id, _MISSING)
+    known_users.add(user_id)
+    try:
+        await usersdb.update_one(
+            {"user_id": user_id},
+            {"$set": {"dm_ok": reachable, "dm_checked": checked_at},
+             "$setOnInsert": {"username": None if username is _MISSING else username}},
+            upsert=True
+        )
+    except Exception:
+        # The queued insert still has to happen
+        if username is not _MISSING:
+            _pending_users.setdefault(user_id, username)
+        raise
+
+
+def _maybe_flush():
+    global _flush_task
+    if len(_pending_users) + len(_pending_chats) + len(_removed_chats) < WRITE_BEHIND_BATCH:
+        return
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(flush_pending())
+
+
+async def flush_pending():
+    """
+    Write queued users and chats as idempotent upserts, and queued chat removals.
+    Failed batches are queued again for the next flush.
+    """
+    async with _flush_lock:
+        await _flush()
+
+
+async def _flush():
+    global _pending_users, _pending_chats, _removed_chats
+    users, _pending_users = _pending_users, {}
+    chats, _pending_chats = _pending_chats, {}
+    removed, _removed_chats = _removed_chats, set()
+
+    if users:
+        try:
+            await usersdb.bulk_write([
+                UpdateOne({"user_id": user_id}, {"$setOnInsert": {"user_id": user_id, "username": username}}, upsert=True)
+                for user_id, username in users.items()
+            ], ordered=False)
+        except Exception as ex:
+            LOGGER(__name__).error(f"Failed to flush users: {type(ex).__name__}")
+            _pending_users = {**users, **_pending_users}
+
+    if chats or removed:
+        requests = [
+            UpdateOne({"chat_id": chat_id}, {"$setOnInsert": {"chat_id": chat_id, "title": title}}, upsert=True)
+            for chat_id, title in chats.items()
+        ]
+        requests += [DeleteOne({"chat_id": chat_id}) for chat_id in removed]
+        try:
+            await chatsdb.bulk_write(requests, ordered=False)
+            membership_stats["written"] += len(requests)
+        except Exception as ex:
+            LOGGER(__name__).error(f"Failed to flush chats: {type(ex).__name__}")
+            # Changes made since the batch was taken win over the failed ones
+            for chat_id, title in chats.items():
+                if chat_id not in _removed_chats:
+                    _pending_chats.setdefault(chat_id, title)
+            _removed_chats |= {chat_id for chat_id in removed if chat_id not in _pending_chats}
+
+
+async def write_behind_loop():
+    """
+    Periodically flush queued users and chats. Runs for the bot's lifetime.
     """
-    await chatsdb.delete_one({"chat_id": chat_id})
\ No newline at end of file
+    while True:
+        await asyncio.sleep(WRITE_BEHIND_INTERVAL)
+        await flush_pending()
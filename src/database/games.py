@@ -0,0 +1,20 @@
+from pymongo import ReplaceOne, DeleteOne
+
+from . import games_collection
+
+
+async def save_games(snapshots, ended):
+    """
+    Upsert game snapshots and delete finished games in one batch.
+    """
+    requests = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in snapshots]
+    requests += [DeleteOne({"_id": chat_id}) for chat_id in ended]
+    if requests:
+        await games_collection.bulk_write(requests, ordered=False)
+
+
+async def load_games() -> list:
+    """
+    Fetch every stored game snapshot.
+    """
+    return await games_collection.find({}).to_list(length=None)
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from config import PLAYER_CLAIM_TTL
+from . import playersdb
+
+
+async def ensure_player_indexes():
+    """
+    Index used to release every player of a finished game at once, and a TTL
+    index so claims a crashed worker never released eventually expire.
+    The unique _id (user_id) is what enforces one game per player.
+    """
+    await playersdb.create_index("chat_id")
+    await playersdb.create_index("claimed_at", expireAfterSeconds=PLAYER_CLAIM_TTL)
+
+
+async def claim_player(user_id: int, chat_id: int) -> bool:
+    """
+    Reserve a player for the game in chat_id.
+    Returns False when the player is already in a game in another chat.
+    """
+    try:
+        await playersdb.insert_one({"_id": user_id, "chat_id": chat_id, "claimed_at": datetime.now(timezone.utc)})
+        return True
+    except DuplicateKeyError:
+        doc = await playersdb.find_one({"_id": user_id}, {"chat_id": 1})
+        # The claim may have been released between the two calls
+        if doc is None:
+            return await claim_player(user_id, chat_id)
+        return doc["chat_id"] == chat_id
+
+
+async def release_players(chat_id: int, user_ids=None):
+    """
+    Release players of the game in chat_id (all of them when user_ids is None).
+    """
+    query = {"chat_id": chat_id}
+    if user_ids is not None:
+        query["_id"] = {"$in": list(user_ids)}
+    await playersdb.delete_many(query)
+
+
+async def get_claimed_chats() -> list:
+    """
+    Chat ids that currently hold at least one player claim.
+    """
+    return await playersdb.distinct("chat_id")
+
+
+async def get_player_chat(user_id: int) -> Optional[int]:
+    """
+    Chat id of the game a player is in, if any.
+    """
+    doc = await playersdb.find_one({"_id": user_id}, {"chat_id": 1})
+    return doc["chat_id"] if doc else None
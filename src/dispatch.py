@@ -0,0 +1,136 @@
+import asyncio
+from random import random
+from time import perf_counter
+
+from pyrogram import Client
+from pyrogram.types import Message, CallbackQuery
+
+from config import SLOW_HANDLER_MS, HANDLER_SAMPLE_RATE
+from src import app, metrics
+from src.logging import LOGGER, log_context
+from src.metrics import handler_seconds, handler_errors, slow_handlers
+from src.utils.callbacks import parse_callback_data
+
+
+_startup = None     # event updates wait on while boot() restores state
+_dropping = False   # startup failed: updates are let go without running handlers
+
+
+def hold_updates():
+    """Hold updates back until release_updates(), so handlers can go live before the games are restored"""
+    global _startup
+    _startup = asyncio.Event()
+
+
+def release_updates():
+    if _startup is not None:
+        _startup.set()
+
+
+def drop_updates():
+    """Discard held and later updates instead of handling them; used when startup fails"""
+    global _dropping
+    _dropping = True
+    release_updates()
+
+
+class Router:
+    """Route table for one update type: a dict lookup per update, whatever the number of routes"""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.routes = {}        # name -> (handler, filters)
+        self.counts = {}        # name -> [calls, errors, total seconds, max seconds]
+
+    def on(self, name: str, filters=None):
+        """Register the decorated handler for route `name`; filters are checked only for that route"""
+        def decorator(func):
+            if name in self.routes:
+                raise ValueError(f"{self.kind} route {name!r} is already registered")
+            self.routes[name] = (func, filters)
+            self.counts[name] = [0, 0, 0.0, 0.0]
+            return func
+        return decorator
+
+    async def dispatch(self, client: Client, update, name: str, *args):
+        route = self.routes.get(name)
+        if route is None:
+            return
+        if _startup is not None and not _startup.is_set():
+            await _startup.wait()
+        if _dropping:
+            return
+        func, filters = route
+        if filters is not None and not await filters(client, update):
+            return
+
+        counts = self.counts[name]
+        chat = getattr(update, "chat", None) or getattr(getattr(update, "message", None), "chat", None)
+        with log_context(handler=f"{self.kind}:{name}", chat_id=chat.id if chat else None):
+            started = perf_counter()
+            try:
+                await func(client, update, *args)
+            except Exception:
+                counts[1] += 1
+                handler_errors.inc(self.kind, name)
+                raise
+            finally:
+                elapsed = perf_counter() - started
+                counts[0] += 1
+                counts[2] += elapsed
+                counts[3] = max(counts[3], elapsed)
+                handler_seconds.observe(elapsed, self.kind, name)
+                self._log_timing(update, chat, name, elapsed)
+                if metrics.first_update_seconds is None:
+                    metrics.mark_first_update()
+
+    def _log_timing(self, update, chat, name: str, elapsed: float):
+        ms = elapsed * 1000
+        if ms >= SLOW_HANDLER_MS:
+            slow_handlers.inc(self.kind, name)
+            LOGGER(__name__).warning(
+                f"Slow {self.kind} {name!r}: {ms:.0f} ms (chat {chat.id if chat else None}, "
+                f"user {update.from_user.id if update.from_user else None})"
+            )
+        elif HANDLER_SAMPLE_RATE and random() < HANDLER_SAMPLE_RATE:
+            LOGGER(__name__).info(f"Sampled {self.kind} {name!r}: {ms:.1f} ms")
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "count": calls,
+                "errors": errors,
+                "avg_ms": total / calls * 1000 if calls else 0.0,
+                "max_ms": longest * 1000,
+            }
+            for name, (calls, errors, total, longest) in self.counts.items()
+        }
+
+
+commands = Router("command")
+callbacks = Router("callback")
+
+
+@app.on_message()
+async def dispatch_command(client: Client, message: Message):
+    text = message.text
+    if not text or text[0] != "/":
+        return
+
+    words = text.split()
+    name, _, username = words[0][1:].partition("@")
+    # "/start@OtherBot" in a group is meant for another bot
+    if username and username.lower() != (client.me.username or "").lower():
+        return
+
+    name = name.lower()
+    message.command = [name] + words[1:]
+    await commands.dispatch(client, message, name)
+
+
+@app.on_callback_query()
+async def dispatch_callback(client: Client, callback_query: CallbackQuery):
+    if not isinstance(callback_query.data, str):
+        return
+    name, args = parse_callback_data(callback_query.data)
+    await callbacks.dispatch(client, callback_query, name, *args)
@@ -1,18 +1,105 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(asctime)s - %(levelname)s] - %(name)s - %(message)s",
-    datefmt="%d-%b-%y %H:%M:%S",
-    handlers=[
-        logging.FileHandler("log.txt"),     # Logs to file
-        logging.StreamHandler(),            # Logs to console
-    ],
+from config import (
+    LOG_FILE, LOG_MAX_BYTES, LOG_ROTATE_WHEN, LOG_BACKUPS, LOG_FORMAT, LOG_LEVEL, LOG_LEVELS
 )
 
-# Suppress unnecessary logs from libraries
-logging.getLogger("pymongo").setLevel(logging.ERROR)
-logging.getLogger("pyrogram").setLevel(logging.ERROR)
+# Fields attached to every record logged while handling an update
+CONTEXT_FIELDS = ("chat_id", "game_hash", "handler")
+_context = ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**fields):
+    """Tag every record logged inside the block (chat_id, game_hash, handler)"""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class _ContextFilter(logging.Filter):
+    # Runs in the thread that logged, where the update's context is still set
+    def filter(self, record):
+        context = _context.get()
+        for field in CONTEXT_FIELDS:
+            setattr(record, field, context.get(field))
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _file_handler():
+    if LOG_ROTATE_WHEN:
+        return logging.handlers.TimedRotatingFileHandler(
+            LOG_FILE, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUPS, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+    )
+
+
+def _setup():
+    if LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "[%(asctime)s - %(levelname)s] - %(name)s - %(message)s", datefmt="%d-%b-%y %H:%M:%S"
+        )
+
+    handlers = [logging.StreamHandler()]   # Logs to console
+    if LOG_FILE:
+        handlers.append(_file_handler())   # Logs to file, rotated
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # The event loop only puts records on a queue; a background thread does the I/O
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(_ContextFilter())
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(LOG_LEVEL.upper())
+
+    # Suppress unnecessary logs from libraries unless LOG_LEVELS says otherwise
+    levels = {"pymongo": "ERROR", "pyrogram": "ERROR"}
+    for entry in filter(None, (part.strip() for part in LOG_LEVELS.split(","))):
+        name, _, level = entry.partition("=")
+        levels[name.strip()] = level.strip()
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+
+_setup()
 
 def LOGGER(name: str) -> logging.Logger:
-    return logging.getLogger(name)
\ No newline at end of file
+    return logging.getLogger(name)
@@ -0,0 +1,241 @@
+"""
+Prometheus text metrics served from the bot process.
+
+Counters and histograms are updated where the work happens (the dispatcher,
+Bot.invoke, the Mongo command listener); gauges for games, caches and queues
+are read from the existing stats when /metrics is scraped. The Mongo listener
+runs on Motor's executor threads, so counter and histogram state is locked.
+"""
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter, time
+
+from pymongo import monitoring
+
+from src.logging import LOGGER
+
+# Upper bounds (seconds) of the latency buckets; +Inf is implied
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry = []
+_runner = None
+
+startup_seconds = {}    # startup phase -> seconds it took, filled in by boot()
+first_update_seconds = None
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        self.lock = Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        with self.lock:
+            values = list(self.values.items())
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination"""
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}        # labels -> [count per bucket..., +Inf count, sum]
+        self.lock = Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, *labels):
+        bucket = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bucket] += 1
+            series[-1] += value
+
+    def render(self):
+        with self.lock:
+            # A consistent copy, so a scrape never sees a half-recorded observation
+            all_series = [(labels, list(series)) for labels, series in self.series.items()]
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in all_series:
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                total += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.labels, labels, le)} {total}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {series[-1]!r}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {total}"
+
+
+handler_seconds = Histogram("bot_handler_seconds", "Handler run time by update kind and route", ("kind", "route"))
+handler_errors = Counter("bot_handler_errors_total", "Handlers that raised, by update kind and route", ("kind", "route"))
+slow_handlers = Counter("bot_slow_handlers_total", "Handlers slower than SLOW_HANDLER_MS, by update kind and route", ("kind", "route"))
+api_seconds = Histogram("bot_api_seconds", "Telegram API call time by method", ("method",))
+api_errors = Counter("bot_api_errors_total", "Telegram API calls that raised, by method and error", ("method", "error"))
+floodwaits = Counter("bot_floodwaits_total", "FloodWait errors returned by Telegram, by method", ("method",))
+flood_seconds = Counter("bot_flood_seconds_total", "Seconds Telegram asked us to wait, by method", ("method",))
+mongo_seconds = Histogram("bot_mongo_seconds", "MongoDB command time by command", ("command",))
+mongo_errors = Counter("bot_mongo_errors_total", "MongoDB commands that failed, by command", ("command",))
+
+
+async def timed_phase(phase: str, awaitable):
+    """Await a startup step and record how long it took"""
+    started = perf_counter()
+    try:
+        return await awaitable
+    finally:
+        startup_seconds[phase] = perf_counter() - started
+
+
+def mark_first_update():
+    """Record the time from process start to the first handled update"""
+    global first_update_seconds
+    from src import START_TIME
+
+    first_update_seconds = time() - START_TIME
+    LOGGER(__name__).info(f"First update handled {first_update_seconds:.2f}s after start")
+
+
+class MongoMetrics(monitoring.CommandListener):
+    """Times every MongoDB command; pass as an event listener to the Motor client"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_seconds.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        mongo_seconds.observe(event.duration_micros / 1e6, event.command_name)
+        mongo_errors.inc(event.command_name)
+
+
+def _collected():
+    """(type, name, help, {labels: value}, label names) for state read at scrape time"""
+    from src import app, START_TIME
+    from src.database import membership_stats
+    from src.dispatch import commands, callbacks
+    from src.utils import game as game_module, game_stats, dm_cache, lock_stats, snapshot_stats, teardown_summary
+
+    games = game_stats()
+    outbox = app.outbox.stats()
+    teardown = teardown_summary()
+
+    yield "gauge", "bot_uptime_seconds", "Seconds since the process started", {(): time() - START_TIME}, ()
+    yield "gauge", "bot_startup_phase_seconds", "Time each startup step took", {
+        (phase,): seconds for phase, seconds in startup_seconds.items()
+    }, ("phase",)
+    if first_update_seconds is not None:
+        yield "gauge", "bot_first_update_seconds", "Seconds from process start to the first handled update", {
+            (): first_update_seconds
+        }, ()
+    yield "gauge", "bot_games", "Live games by state", {
+        ("lobby",): games["lobbies"], ("running",): games["running"]
+    }, ("state",)
+    yield "gauge", "bot_games_max", "Live games allowed before /game is refused", {(): games["max_games"]}, ()
+    yield "gauge", "bot_players_in_game", "Players currently in a lobby or game", {(): games["players"]}, ()
+    yield "gauge", "bot_games_bytes_estimate", "Estimated memory held by live games", {(): games["bytes_estimate"]}, ()
+    yield "counter", "bot_games_expired_total", "Idle games ended by the governor, by state", {
+        ("lobby",): games["lobbies_expired"], ("running",): games["games_expired"]
+    }, ("state",)
+
+    for name, cache in (("dm", dm_cache), ("keyboard", game_module._keyboards)):
+        stats = cache.stats()
+        yield "gauge", f"bot_{name}_cache_size", f"Entries in the {name} cache", {(): stats["size"]}, ()
+        yield "counter", f"bot_{name}_cache_lookups_total", f"{name} cache lookups by result", {
+            ("hit",): stats["hits"], ("miss",): stats["misses"]
+        }, ("result",)
+
+    yield "gauge", "bot_outbox_queued", "Requests waiting in the outbox, by priority", {
+        (priority,): depth for priority, depth in outbox["queued_by_priority"].items()
+    }, ("priority",)
+    yield "counter", "bot_outbox_sent_total", "Requests sent by the outbox", {(): outbox["sent"]}, ()
+    yield "gauge", "bot_outbox_max_wait_seconds", "Longest time a request waited in the outbox", {(): outbox["max_wait"]}, ()
+    yield "gauge", "bot_routes", "Registered routes by update kind", {
+        (router.kind,): len(router.routes) for router in (commands, callbacks)
+    }, ("kind",)
+
+    yield "counter", "bot_membership_updates_total", "Chat membership updates by outcome", {
+        (key,): value for key, value in membership_stats.items()
+    }, ("outcome",)
+    yield "counter", "bot_snapshots_total", "Game snapshot writes by kind", {
+        (key,): value for key, value in snapshot_stats.items()
+    }, ("kind",)
+    yield "counter", "bot_lock_contention_total", "Chat lock contention by kind", {
+        (key,): value for key, value in lock_stats.items()
+    }, ("kind",)
+    yield "counter", "bot_teardown_total", "End-of-game teardown work by kind", {
+        (key,): teardown[key] for key in ("games", "edits", "dms", "failed")
+    }, ("kind",)
+    yield "gauge", "bot_teardown_max_seconds", "Longest end-of-game teardown", {(): teardown["max_seconds"]}, ()
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    try:
+        for kind, name, help, values, labels in _collected():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for label_values, value in values.items():
+                lines.append(f"{name}{_labels(labels, label_values)} {_number(value)}")
+    except Exception as ex:
+        LOGGER(__name__).error(f"Failed to collect metrics: {type(ex).__name__}")
+    return "\n".join(lines) + "\n"
+
+
+async def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """Serve /metrics on host:port until stop_metrics_server()"""
+    global _runner
+    from aiohttp import web
+
+    async def metrics(request):
+        return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+    server = web.Application()
+    server.router.add_get("/metrics", metrics)
+    _runner = web.AppRunner(server, access_log=None)
+    await _runner.setup()
+    await web.TCPSite(_runner, host, port).start()
+    LOGGER(__name__).info(f"Serving metrics on {host}:{port}/metrics")
+
+
+async def stop_metrics_server():
+    global _runner
+    if _runner:
+        await _runner.cleanup()
+        _runner = None
@@ -12,5 +12,7 @@ def list_modules():
 ALL_MODULES = frozenset(sorted(list_modules()))
 
 
-for module in ALL_MODULES:
-    importlib.import_module(f"src.modules.{module}")
\ No newline at end of file
+def load_modules():
+    """Import every module; importing one registers its handlers on app"""
+    for module in ALL_MODULES:
+        importlib.import_module(f"src.modules.{module}")
\ No newline at end of file
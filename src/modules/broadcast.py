@@ -1,14 +1,12 @@
-import asyncio
-
 from pyrogram import filters
-from pyrogram.errors import FloodWait
 from pyrogram.types import Message
 
 from src import app
-from src.database import get_chats
+from src.dispatch import commands
+from src.utils import broadcast_running, start_broadcast
 from config import OWNER_ID
 
-@app.on_message(filters.command("broadcast") & filters.user(OWNER_ID))
+@commands.on("broadcast", filters.user(OWNER_ID))
 async def broadcast_(_, message: Message):
     """Broadcasts a single message to all chats and users."""
 
@@ -18,32 +16,23 @@ async def broadcast_(_, message: Message):
     if not reply and not text:
         return await message.reply_text("❖ Reply to a message or provide text to broadcast.")
 
+    if broadcast_running():
+        return await message.reply_text("❖ A broadcast is already running, please wait for it to finish.")
+
     progress_msg = await message.reply_text("❖ Broadcasting message, please wait...")
 
-    sent, users, failed = 0, 0, 0
-    data = await get_chats()
-    recipients = data["chats"] + data["users"]
-
-    for chat_id in recipients:
-        try:
-            if reply:
-                await reply.copy(chat_id)
-            else:
-                await app.send_message(chat_id, text=text)
-
-            if chat_id < 0:
-                sent += 1
-            else:
-                users += 1
-
-            await asyncio.sleep(0.2)
-
-        except FloodWait as fw:
-            await asyncio.sleep(fw.value + 1)
-        except:
-            failed += 1
-            continue
-
-    await progress_msg.edit_text(
-        f"Broadcasted message to {sent} chats and {users} from the bot."
-    )
\ No newline at end of file
+    job = {
+        "progress_chat_id": progress_msg.chat.id,
+        "progress_message_id": progress_msg.id,
+        "cursor": None,
+        "sent": 0,
+        "users": 0,
+        "failed": 0,
+    }
+    if reply:
+        job["from_chat_id"] = reply.chat.id
+        job["message_id"] = reply.id
+    else:
+        job["text"] = text
+
+    start_broadcast(app, job)
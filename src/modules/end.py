@@ -1,12 +1,12 @@
 from pyrogram import filters
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from pyrogram.enums import ChatMemberStatus
-from typing import Dict, Set
-from src import app
-from src.utils import game_manager
+from config import VOTE_TTL, VOTE_CACHE_SIZE
+from src.dispatch import commands, callbacks
+from src.utils import game_manager, TTLCache, serialized, callback_data
 
-# Track votes to end games
-game_end_votes: Dict[int, Set[int]] = {}  # {chat_id: {user_ids}}
+# Track votes to end games; stale votes expire with the cache
+game_end_votes = TTLCache(maxsize=VOTE_CACHE_SIZE, ttl=VOTE_TTL)  # {chat_id: {user_ids}}
 
 async def is_admin(client, chat_id: int, user_id: int) -> bool:
     try:
@@ -25,7 +25,7 @@ async def update_vote_message(client, chat_id: int, message_id: int):
     keyboard = InlineKeyboardMarkup([
         [InlineKeyboardButton(
             text=f"🗳️ Vote to End ({current_votes}/3)",
-            callback_data="vote_end_game"
+            callback_data=callback_data("vote_end_game")
         )]
     ])
 
@@ -43,7 +43,8 @@ async def update_vote_message(client, chat_id: int, message_id: int):
     except Exception:
         pass
 
-@app.on_message(filters.command("stop") & filters.group)
+@commands.on("stop", filters.group)
+@serialized
 async def end_game_command(client, message):
     game = game_manager.get_game(message.chat.id)
     if not game:
@@ -79,7 +80,7 @@ async def end_game_command(client, message):
     keyboard = InlineKeyboardMarkup([
         [InlineKeyboardButton(
             text=f"🗳️ Vote to End ({current_votes}/3)",
-            callback_data="vote_end_game"
+            callback_data=callback_data("vote_end_game")
         )]
     ])
 
@@ -94,7 +95,8 @@ async def end_game_command(client, message):
     if not hasattr(game, 'vote_message_id'):
         game.vote_message_id = vote_msg.id
 
-@app.on_callback_query(filters.regex("^vote_end_game$"))
+@callbacks.on("vote_end_game")
+@serialized
 async def vote_end_game_callback(client, callback_query):
     game = game_manager.get_game(callback_query.message.chat.id)
     if not game:
@@ -1,67 +1,100 @@
+import asyncio
+from time import monotonic
 from pyrogram import filters, enums
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from config import TURN_TIMEOUT
 from src import app
+from src.dispatch import commands, callbacks
+from src.logging import log_context
 from src.utils import (
     game_manager,
-    can_send_dm,
+    check_dms,
+    schedule_dm_check,
     format_player_list,
-    cleanup_game_messages
+    start_teardown,
+    serialized,
+    chat_lock,
+    turn_timers
 )
 
-async def disable_expired_buttons(client, game):
-    """Disable all buttons from the ended game"""
-    for message_id, chat_id in game.active_button_messages:
-        try:
-            await client.edit_message_text(
-                chat_id=chat_id,
-                message_id=message_id,
-                text="🎮 Game session ended. Buttons disabled.",
-                reply_markup=None
-            )
-        except Exception:
-            pass
-    game.clear_button_messages()
-
-async def handle_blocked_player(client, game, player_id):
-    player = next((p for p in game.players if p['id'] == player_id), None)
-    if not player:
-        return
-
-    card, next_player_id = game.get_random_card(player_id)
-    next_player = next((p for p in game.players if p['id'] == next_player_id), None)
-    if not card or not next_player:
-        return
+def arm_turn_timer(game, player_id):
+    """(Re)start the chat's turn timer; one timer per game, replaced every turn"""
+    if TURN_TIMEOUT:
+        turn_timers.schedule(game.chat_id, TURN_TIMEOUT, on_turn_timeout, game.chat_id, player_id, game.game_hash)
 
-    # Get user objects for mentions
+def resume_turn_timers():
+    """Give the current player of every running game a fresh timer (after a restart)"""
+    for game in list(game_manager.games.values()):
+        current = game.get_current_player() if game.started else None
+        if current:
+            arm_turn_timer(game, current.id)
+
+async def on_turn_timeout(chat_id, player_id, game_hash):
+    with log_context(chat_id=chat_id, game_hash=game_hash, handler="turn_timeout"):
+        async with chat_lock(chat_id):
+            game = game_manager.get_game(chat_id)
+            if not game or not game.started or not game.is_valid_hash(game_hash):
+                return
+            current = game.get_current_player()
+            if current and current.id == player_id:
+                await handle_blocked_player(app, game, player_id, timed_out=True)
+
+async def send_turn_prompt(client, game, player, text) -> bool:
+    """DM a player their cards and start their turn timer; False if they can't be reached"""
+    buttons = game.get_card_buttons(player.id)
+    if not buttons:
+        # Nothing to pass: the caller moves the turn on like for an unreachable player
+        return False
     try:
-        blocked_user = await client.get_users(player_id)
-        next_user = await client.get_users(next_player_id)
-
-        await client.send_message(
-            game.chat_id,
-            f"⚠️ {blocked_user.mention} couldn't be reached. Auto-passed card to {next_user.mention}"
-        )
+        msg = await client.send_message(player.id, text, reply_markup=buttons)
     except Exception:
-        await client.send_message(
-            game.chat_id,
-            f"⚠️ {player['name']} couldn't be reached. Auto-passed card to {next_player['name']}"
-        )
+        return False
+    game.add_button_message(msg.id, msg.chat.id)
+    arm_turn_timer(game, player.id)
+    return True
+
+async def handle_blocked_player(client, game, player_id, timed_out=False):
+    """Auto-pass for a player who can't be reached or ran out of time, until a turn prompt gets through"""
+    # A full round of unreachable players leaves the game to the turn timer
+    for _ in range(len(game.players)):
+        player = game.get_player(player_id)
+        if not player:
+            return
+
+        if game.player_hands.get(player_id):
+            card, next_player_id = game.get_random_card(player_id)
+        else:
+            # An empty hand has nothing to auto-pass, so only the turn moves on
+            card, next_player_id = None, game.skip_turn(player_id)
+        next_player = game.get_player(next_player_id)
+        if not next_player or (not card and next_player_id == player_id):
+            return
+
+        blocked_mention = await game.mentions.get(client, player)
+        next_mention = await game.mentions.get(client, next_player)
+        if card:
+            reason = "ran out of time" if timed_out else "couldn't be reached"
+            notice = f"⚠️ {blocked_mention} {reason}. Auto-passed card to {next_mention}"
+            prompt = f"You received {card} from {player.name}. Choose a card to pass:"
+        else:
+            notice = f"⚠️ {blocked_mention} has no cards to pass. It's {next_mention}'s turn."
+            prompt = "🎮 Select a card to pass to the next player."
+        await client.send_message(game.chat_id, notice)
+
+        current_player = game.get_current_player()
+        if not current_player:
+            return
+        if await send_turn_prompt(client, game, current_player, prompt):
+            return
+        player_id = current_player.id
+        timed_out = False
 
     current_player = game.get_current_player()
     if current_player:
-        buttons = game.get_card_buttons(current_player['id'])
-        if buttons:
-            try:
-                msg = await client.send_message(
-                    current_player['id'],
-                    f"You received {card} from {player['name']}. Choose a card to pass:",
-                    reply_markup=buttons
-                )
-                game.add_button_message(msg.id, msg.chat.id)
-            except:
-                await handle_blocked_player(client, game, current_player['id'])
-
-@app.on_message(filters.command("game"))
+        arm_turn_timer(game, current_player.id)
+
+@commands.on("game")
+@serialized
 async def new_game(client, message):
     if message.chat.type not in [enums.ChatType.GROUP, enums.ChatType.SUPERGROUP]:
         return await message.reply("Please use this command in a group chat.")
@@ -69,13 +102,19 @@ async def new_game(client, message):
     if game_manager.get_game(message.chat.id):
         return await message.reply("⚠️ A game is already in progress!")
 
+    if game_manager.at_capacity():
+        return await message.reply("🚫 Too many games are running right now. Please try again in a few minutes.")
+
     # Check if user is already in another group's game
     existing_chat = game_manager.get_player_active_chat(message.from_user.id)
     if existing_chat and existing_chat != message.chat.id:
         return await message.reply("⚠️ You're already playing in another group! Finish that game first.")
+    if not await game_manager.claim_player(message.from_user.id, message.chat.id):
+        return await message.reply("⚠️ You're already playing in another group! Finish that game first.")
 
     game = game_manager.create_game(host_id=message.from_user.id, chat_id=message.chat.id)
     if not game:
+        game_manager.release_claim(message.chat.id, message.from_user.id)
         return await message.reply("⚠️ You're already playing in another group! Finish that game first.")
 
     await message.reply(
@@ -85,7 +124,8 @@ async def new_game(client, message):
         "Host can use /begin to start."
     )
 
-@app.on_message(filters.command("join"))
+@commands.on("join")
+@serialized
 async def join_game(client, message):
     game = game_manager.get_game(message.chat.id)
     if not game:
@@ -95,16 +135,22 @@ async def join_game(client, message):
     if len(game.players) >= 8:
         return await message.reply("⚠️ Game is full! (Max 8 players)")
 
+    if not await game_manager.claim_player(message.from_user.id, message.chat.id):
+        return await message.reply("⚠️ You're already playing in another group! Finish that game first.")
+
     success, msg = game_manager.add_player(message.chat.id, message.from_user.id, message.from_user.first_name)
     if success:
+        schedule_dm_check(client, message.from_user.id)
         player_list = format_player_list(game.players)
         await message.reply(
             f"🎮 {message.from_user.mention} joined!\n👥 Players: {len(game.players)}/8 joined (need minimum 4)"
         )
     else:
+        game_manager.release_claim(message.chat.id, message.from_user.id)
         await message.reply(f"⚠️ {msg}")
 
-@app.on_message(filters.command("begin"))
+@commands.on("begin")
+@serialized
 async def begin_game(client, message):
     game = game_manager.get_game(message.chat.id)
     if not game:
@@ -116,15 +162,13 @@ async def begin_game(client, message):
     if len(game.players) < 4:
         return await message.reply("👥 Need at least 4 players to start!")
 
-    # Get user objects for mentions in unavailable players list
-    unavailable_users = []
-    for p in game.players:
-        if not await can_send_dm(client, p['id']):
-            try:
-                user = await client.get_users(p['id'])
-                unavailable_users.append(user.mention)
-            except:
-                unavailable_users.append(p['name'])
+    # Resolve every player's mention with one request (turns reuse the cache) while
+    # DM reachability is mostly answered from what /join and /start already checked
+    _, reachable = await asyncio.gather(
+        game.mentions.prefetch(client, game.players),
+        check_dms(client, [p.id for p in game.players])
+    )
+    unavailable_users = [game.mentions.cached(p) for p in game.players if not reachable[p.id]]
 
     if unavailable_users:
         btn = InlineKeyboardMarkup([
@@ -141,55 +185,36 @@ async def begin_game(client, message):
 
     first_player = game.get_current_player()
     if first_player:
-        # Get user object for mention
-        try:
-            first_user = await client.get_users(first_player['id'])
-            await client.send_message(
-                game.chat_id,
-                f"🎮 {first_user.mention}'s turn! Choose a card to pass."
-            )
-        except:
-            await client.send_message(
-                game.chat_id,
-                f"🎮 {first_player['name']}'s turn! Choose a card to pass."
-            )
+        await client.send_message(
+            game.chat_id,
+            f"🎮 {game.mentions.cached(first_player)}'s turn! Choose a card to pass."
+        )
 
-        buttons = game.get_card_buttons(first_player['id'])
-        if buttons:
-            try:
-                msg = await client.send_message(
-                    first_player['id'],
-                    f"🎮You're first! Select a card to pass",
-                    reply_markup=buttons
-                )
-                game.add_button_message(msg.id, msg.chat.id)
-            except:
-                await handle_blocked_player(client, game, first_player['id'])
+        if not await send_turn_prompt(client, game, first_player, f"🎮You're first! Select a card to pass"):
+            await handle_blocked_player(client, game, first_player.id)
 
     # Inform others of their upcoming turns with mentions
     for p in game.players:
-        if p['id'] != first_player['id']:
-            before_names = []
-            for pl in game.players:
-                if (pl['id'] in game.turn_order[:game.turn_order.index(p['id'])] and 
-                    pl['id'] not in game.locked_players):
-                    try:
-                        user = await client.get_users(pl['id'])
-                        before_names.append(user.mention)
-                    except:
-                        before_names.append(pl['name'])
+        if p.id != first_player.id:
+            seat = game.seat_of(p.id)
+            before_names = [
+                game.mentions.cached(pl)
+                for pl in game.players
+                if game.seat_of(pl.id) < seat and pl.id not in game.locked_players
+            ]
 
             if before_names:
-                await client.send_message(p['id'], f"⏳ Your turn comes after: {', '.join(before_names)}")
+                await client.send_message(p.id, f"⏳ Your turn comes after: {', '.join(before_names)}")
 
-@app.on_callback_query(filters.regex(r"^pass_(\d+)_([a-f0-9]{8})$"))
-async def handle_card_selection(client, callback_query):
+@callbacks.on("pass")
+@serialized
+async def handle_card_selection(client, callback_query, *args):
     user_id = callback_query.from_user.id
 
     # Extract card index and game hash from callback data
     try:
-        card_index = int(callback_query.matches[0].group(1))
-        provided_hash = callback_query.matches[0].group(2)
+        card_index = int(args[0])
+        provided_hash = args[1]
     except (IndexError, ValueError):
         await callback_query.answer("❌ Invalid button data!", show_alert=True)
         return
@@ -218,16 +243,11 @@ async def handle_card_selection(client, callback_query):
         await callback_query.answer(str(e), show_alert=True)
         return
 
-    next_player = next((p for p in game.players if p['id'] == next_player_id), None)
+    next_player = game.get_player(next_player_id)
     if not next_player:
         return
 
-    # Get next player mention
-    try:
-        next_user = await client.get_users(next_player_id)
-        next_mention = next_user.mention
-    except:
-        next_mention = next_player['name']
+    next_mention = await game.mentions.get(client, next_player)
 
     try:
         await callback_query.message.edit_text(
@@ -241,35 +261,24 @@ async def handle_card_selection(client, callback_query):
     if len(game.locked_players) < len(game.players) - 1:
         current = game.get_current_player()
         if current:
-            # Get current player mention
-            try:
-                current_user = await client.get_users(current['id'])
-                current_mention = current_user.mention
-            except:
-                current_mention = current['name']
-
+            current_mention = await game.mentions.get(client, current)
             await client.send_message(
                 game.chat_id,
                 f"🎮 {current_mention}'s turn! Choose a card to pass."
             )
-            buttons = game.get_card_buttons(current['id'])
-            if buttons:
-                try:
-                    msg = await client.send_message(
-                        current['id'],
-                        f"🎮 You received {card} from {callback_query.from_user.mention}. Choose a card to pass.",
-                        reply_markup=buttons
-                    )
-                    game.add_button_message(msg.id, msg.chat.id)
-                except:
-                    await handle_blocked_player(client, game, current['id'])
+            if not await send_turn_prompt(
+                client, game, current,
+                f"🎮 You received {card} from {callback_query.from_user.mention}. Choose a card to pass."
+            ):
+                await handle_blocked_player(client, game, current.id)
 
     await callback_query.answer()
 
     if len(game.locked_players) >= len(game.players) - 1:
         await end_game(client, game)
 
-@app.on_message(filters.command("lock") & filters.private)
+@commands.on("lock", filters.private)
+@serialized
 async def lock_game(client, message):
     game = game_manager.get_game_by_player(message.from_user.id)
     if not game:
@@ -287,62 +296,42 @@ async def lock_game(client, message):
         else:
             current = game.get_current_player()
             if current:
-                buttons = game.get_card_buttons(current['id'])
-                if buttons:
-                    # Get current player mention
-                    try:
-                        current_user = await client.get_users(current['id'])
-                        current_mention = current_user.mention
-                    except:
-                        current_mention = current['name']
-
+                if game.get_card_buttons(current.id):
+                    current_mention = await game.mentions.get(client, current)
                     await client.send_message(
                         game.chat_id,
                         f"🎮 {current_mention}'s turn now!"
                     )
-                    try:
-                        msg = await client.send_message(
-                            current['id'],
-                            f"🎮 Select a card to pass to the next player.",
-                            reply_markup=buttons
-                        )
-                        game.add_button_message(msg.id, msg.chat.id)
-                    except:
-                        await handle_blocked_player(client, game, current['id'])
+                    if not await send_turn_prompt(client, game, current, f"🎮 Select a card to pass to the next player."):
+                        await handle_blocked_player(client, game, current.id)
     else:
         await message.reply("You don't have matching cards yet!")
 
 async def end_game(client, game):
-    await disable_expired_buttons(client, game)
-    await cleanup_game_messages(client, game)
+    """Post the result to the group first; buttons and game-over DMs are handled in the background"""
+    started = monotonic()
+    game_manager.end_game(game.chat_id)
 
-    remaining = [p for p in game.players if p['id'] not in game.locked_players]
-    if remaining:
-        loser = remaining[0]
-
-        # Get loser mention
-        try:
-            loser_user = await client.get_users(loser['id'])
-            loser_mention = loser_user.mention
-        except:
-            loser_mention = loser['name']
-
-        # Get winner mentions
-        winner_mentions = []
-        for p in game.players:
-            if p['id'] in game.locked_players:
-                try:
-                    winner_user = await client.get_users(p['id'])
-                    winner_mentions.append(f"• {winner_user.mention}")
-                except:
-                    winner_mentions.append(f"• {p['name']}")
-
-        winners_text = "\n".join(winner_mentions)
-        await client.send_message(
-            game.chat_id,
-            f"🎉 Game Over!\n🏆 Winners:\n{winners_text}\n\n{loser_mention} was the last without a set."
-        )
-    else:
-        await client.send_message(game.chat_id, f"🎉 Game Over! Thanks for playing.")
-
-    game_manager.end_game(game.chat_id)
\ No newline at end of file
+    try:
+        remaining = [p for p in game.players if p.id not in game.locked_players]
+        if remaining:
+            loser = remaining[0]
+
+            # Mentions were resolved at /begin, so this doesn't hit the network
+            await game.mentions.prefetch(client, game.players)
+            loser_mention = game.mentions.cached(loser)
+            winner_mentions = [
+                f"• {game.mentions.cached(p)}"
+                for p in game.players
+                if p.id in game.locked_players
+            ]
+
+            winners_text = "\n".join(winner_mentions)
+            await client.send_message(
+                game.chat_id,
+                f"🎉 Game Over!\n🏆 Winners:\n{winners_text}\n\n{loser_mention} was the last without a set."
+            )
+        else:
+            await client.send_message(game.chat_id, f"🎉 Game Over! Thanks for playing.")
+    finally:
+        start_teardown(client, game, started)
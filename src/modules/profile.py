@@ -0,0 +1,76 @@
+import asyncio
+import io
+
+from pyrogram import filters
+from pyrogram.types import Message
+
+from src.dispatch import commands
+from src.logging import LOGGER
+from src.utils import profile_for, profiling_running, stop_profile, memory_snapshot, stop_memory_tracing
+from config import OWNER_ID
+
+# Bounds of /profile <seconds>
+DEFAULT_PROFILE_SECONDS = 30
+MAX_PROFILE_SECONDS = 600
+
+_running = set()    # keeps /profile tasks alive until their report is sent
+
+
+async def _send_report(client, message: Message, report: str, filename: str, caption: str):
+    document = io.BytesIO(report.encode())
+    document.name = filename
+    try:
+        await client.send_document(message.chat.id, document, caption=caption)
+    except Exception as ex:
+        LOGGER(__name__).error(f"Failed to send {filename}: {type(ex).__name__}")
+
+
+async def _profile(client, message: Message, seconds: int):
+    try:
+        report = await profile_for(seconds)
+    except Exception as ex:
+        return await message.reply_text(f"❖ Profiling failed: {type(ex).__name__}")
+    await _send_report(client, message, report, "profile.txt", "❖ cProfile report, sorted by cumulative and own time.")
+
+
+@commands.on("profile", filters.user(OWNER_ID))
+async def profile_(client, message: Message):
+    """Profiles the event loop for N seconds: /profile [seconds|stop]"""
+
+    arg = message.command[1].lower() if len(message.command) > 1 else None
+    if arg == "stop":
+        if not stop_profile():
+            return await message.reply_text("❖ No profile is running.")
+        return
+
+    if profiling_running():
+        return await message.reply_text("❖ A profile is already running, use /profile stop to end it early.")
+
+    try:
+        seconds = int(arg) if arg else DEFAULT_PROFILE_SECONDS
+    except ValueError:
+        return await message.reply_text("❖ Usage: /profile [seconds|stop]")
+    seconds = max(1, min(seconds, MAX_PROFILE_SECONDS))
+
+    await message.reply_text(f"❖ Profiling for {seconds} seconds...")
+    # The profile runs in the background so this handler doesn't hold a worker
+    task = asyncio.create_task(_profile(client, message, seconds))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+
+
+@commands.on("memsnap", filters.user(OWNER_ID))
+async def memsnap_(client, message: Message):
+    """Diffs tracemalloc snapshots: /memsnap [stop]"""
+
+    if len(message.command) > 1 and message.command[1].lower() == "stop":
+        if stop_memory_tracing():
+            return await message.reply_text("❖ Memory tracing stopped.")
+        return await message.reply_text("❖ Memory tracing isn't running.")
+
+    report = memory_snapshot()
+    if report is None:
+        return await message.reply_text(
+            "❖ Memory tracing started. Run /memsnap again later to see what grew, /memsnap stop to end it."
+        )
+    await _send_report(client, message, report, "memsnap.txt", "❖ Allocation growth since the previous snapshot.")
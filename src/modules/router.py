@@ -0,0 +1,40 @@
+from pyrogram import Client
+from pyrogram.enums import ChatType
+from pyrogram.types import Message, CallbackQuery, ChatMemberUpdated
+
+from config import WORKERS
+from src import app
+from src.utils import game_manager, owns_chat
+
+
+async def owner_chat(user, chat) -> int:
+    """Chat id an update belongs to: the group, or the game chat of a player's DM"""
+    if chat is not None and chat.type != ChatType.PRIVATE:
+        return chat.id
+    if user is None:
+        return chat.id
+
+    chat_id = game_manager.get_player_active_chat(user.id)
+    if chat_id is None and game_manager.registry is not None:
+        chat_id = await game_manager.registry.lookup(user.id)
+    return chat_id or user.id
+
+
+# Every worker receives every update; the ones for chats owned by
+# another worker are dropped before any other handler sees them.
+if WORKERS > 1:
+    @app.on_message(group=-1)
+    async def route_message(client: Client, message: Message):
+        if not owns_chat(await owner_chat(message.from_user, message.chat)):
+            message.stop_propagation()
+
+    @app.on_callback_query(group=-1)
+    async def route_callback(client: Client, callback_query: CallbackQuery):
+        chat = callback_query.message.chat if callback_query.message else None
+        if not owns_chat(await owner_chat(callback_query.from_user, chat)):
+            callback_query.stop_propagation()
+
+    @app.on_chat_member_updated(group=-1)
+    async def route_member_update(client: Client, update: ChatMemberUpdated):
+        if not owns_chat(update.chat.id):
+            update.stop_propagation()
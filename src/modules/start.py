@@ -1,13 +1,15 @@
 import asyncio
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, ChatMemberUpdated
-from pyrogram.enums import ChatType, ParseMode
+from pyrogram.enums import ChatType, ChatMemberStatus, ParseMode
 from pyrogram.errors import MessageNotModified
 from src import app
-from src.database import add_user, add_chat, remove_chat
+from src.dispatch import commands, callbacks
+from src.database import add_user, add_chat, remove_chat, membership_stats
+from src.utils import mark_dm_reachable, callback_data
 
 
-@app.on_message(filters.command("start") & ~filters.bot)
+@commands.on("start", ~filters.bot)
 async def start(client: Client, m: Message):
     bot_name = app.name
 
@@ -26,13 +28,14 @@ Ready to test your skills? Let the games begin! 🎮""",
             reply_markup=InlineKeyboardMarkup([
                 [InlineKeyboardButton("🎮 Start New Game", url=f"https://t.me/{app.username}?startgroup=true")],
                 [
-                    InlineKeyboardButton("📚 Game Rules", callback_data="game_rules"),
+                    InlineKeyboardButton("📚 Game Rules", callback_data=callback_data("game_rules")),
                     InlineKeyboardButton("👥 Support Group", url="https://t.me/DebugAngels")
                 ]
             ]),
             parse_mode=ParseMode.HTML,
             reply_to_message_id=m.id
         )
+        await mark_dm_reachable(user_id)
 
     elif m.chat.type in {ChatType.GROUP, ChatType.SUPERGROUP}:
         chat_id = m.chat.id
@@ -41,15 +44,15 @@ Ready to test your skills? Let the games begin! 🎮""",
         await m.reply_text(
             f"Hey {m.from_user.mention}, I'm here to bring excitement to your group! 🎉",
             reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("📚 How to Play", callback_data="game_rules")],
-                [InlineKeyboardButton("🎮 Create Game", callback_data="create_game_info")]
+                [InlineKeyboardButton("📚 How to Play", callback_data=callback_data("game_rules"))],
+                [InlineKeyboardButton("🎮 Create Game", callback_data=callback_data("create_game_info"))]
             ]),
             parse_mode=ParseMode.HTML,
             reply_to_message_id=m.id
         )
 
 
-@app.on_callback_query(filters.regex("^game_rules$"))
+@callbacks.on("game_rules")
 async def game_rules(client: Client, callback_query):
     await callback_query.answer()
 
@@ -89,7 +92,7 @@ Collect all cards of the same type (emoji) to win the round!
 <i>📝 Found a bug? Use <b>/feedback</b> to report it!</i>"""
 
     back_button = InlineKeyboardMarkup([
-        [InlineKeyboardButton("🔙 Back to Main", callback_data="back_to_start")]
+        [InlineKeyboardButton("🔙 Back to Main", callback_data=callback_data("back_to_start"))]
     ])
 
     try:
@@ -102,7 +105,7 @@ Collect all cards of the same type (emoji) to win the round!
         pass
 
 
-@app.on_callback_query(filters.regex("^create_game_info$"))
+@callbacks.on("create_game_info")
 async def create_game_info(client: Client, callback_query):
     await callback_query.answer()
 
@@ -134,7 +137,7 @@ Game creator uses <code>/begin</code> to start the match.
 Ready to create some fun? Use <code>/game</code> now! 🚀"""
 
     back_button = InlineKeyboardMarkup([
-        [InlineKeyboardButton("🔙 Back", callback_data="back_to_start")]
+        [InlineKeyboardButton("🔙 Back", callback_data=callback_data("back_to_start"))]
     ])
 
     try:
@@ -147,7 +150,7 @@ Ready to create some fun? Use <code>/game</code> now! 🚀"""
         pass
 
 
-@app.on_callback_query(filters.regex("^back_to_start$"))
+@callbacks.on("back_to_start")
 async def back_to_start(client: Client, callback_query):
     await callback_query.answer()
     user = callback_query.from_user
@@ -165,15 +168,15 @@ Ready to test your skills? Let the games begin! 🎮"""
         markup = InlineKeyboardMarkup([
             [InlineKeyboardButton("🎮 Start New Game", url=f"https://t.me/{app.username}?startgroup=true")],
             [
-                InlineKeyboardButton("📚 Game Rules", callback_data="game_rules"),
+                InlineKeyboardButton("📚 Game Rules", callback_data=callback_data("game_rules")),
                 InlineKeyboardButton("👥 Support Group", url="https://t.me/DebugAngels")
             ]
         ])
     else:
         text = f"Hey {user.mention}, I'm here to bring excitement to your group! 🎉"
         markup = InlineKeyboardMarkup([
-            [InlineKeyboardButton("📚 How to Play", callback_data="game_rules")],
-            [InlineKeyboardButton("🎮 Create Game", callback_data="create_game_info")]
+            [InlineKeyboardButton("📚 How to Play", callback_data=callback_data("game_rules"))],
+            [InlineKeyboardButton("🎮 Create Game", callback_data=callback_data("create_game_info"))]
         ])
 
     try:
@@ -188,24 +191,29 @@ Ready to test your skills? Let the games begin! 🎮"""
 
 @app.on_chat_member_updated()
 async def chat_updates(client: Client, m: ChatMemberUpdated):
-    bot_id = (await client.get_me()).id
-
-    if m.new_chat_member and m.new_chat_member.user and m.new_chat_member.user.id == bot_id:
-        chat_id = m.chat.id
-        await add_chat(chat_id, m.chat.title)
-
-    elif m.old_chat_member and m.old_chat_member.user and m.old_chat_member.user.id == bot_id and not m.new_chat_member:
-        chat_id = m.chat.id
-        await remove_chat(chat_id)
+    membership_stats["seen"] += 1
+    new, old = m.new_chat_member, m.old_chat_member
+
+    # Most updates are about other members; only the bot's own membership matters
+    member = new or old
+    if not member or not member.user or member.user.id != client.id:
+        membership_stats["ignored"] += 1
+        return
+
+    # Changes are queued per chat and written in batches by the write-behind flush
+    if new and new.status not in (ChatMemberStatus.LEFT, ChatMemberStatus.BANNED):
+        await add_chat(m.chat.id, m.chat.title)
+    else:
+        await remove_chat(m.chat.id)
 
 
-@app.on_message(filters.command("help"))
+@commands.on("help")
 async def help_command(client: Client, m: Message):
     if m.chat.type in {ChatType.GROUP, ChatType.SUPERGROUP}:
         await m.reply_text(
             "Need help? Click below to get detailed information about commands and gameplay!",
             reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("🎮 Game Rules", callback_data="game_rules")]
+                [InlineKeyboardButton("🎮 Game Rules", callback_data=callback_data("game_rules"))]
             ]),
             reply_to_message_id=m.id
         )
@@ -238,7 +246,7 @@ Need more details? Use the buttons below 👇"""
             help_text,
             reply_markup=InlineKeyboardMarkup([
                 [
-                    InlineKeyboardButton("📚 Detailed Rules", callback_data="game_rules"),
+                    InlineKeyboardButton("📚 Detailed Rules", callback_data=callback_data("game_rules")),
                     InlineKeyboardButton("🎮 Start New Game", url=f"https://t.me/{client.me.username}?startgroup=true")
                 ]
             ]),
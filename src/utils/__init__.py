@@ -1,4 +1,18 @@
+from .cache import *
+from .callbacks import *
 from .helpers import *
 from .theme import *
+from .timer import *
+from .shard import *
 from .manager import *
+from .locks import *
+from .governor import *
+from .teardown import *
+from .hand import *
+from .player import *
 from .game import *
+from .mentions import *
+from .outbox import *
+from .broadcast import *
+from .persistence import *
+from .profiling import *
@@ -0,0 +1,194 @@
+import asyncio
+from time import monotonic
+
+from config import BROADCAST_CONCURRENCY
+from src.database import iter_recipients, count_recipients, get_broadcast, save_broadcast, update_broadcast, clear_broadcast
+from src.logging import LOGGER
+from .outbox import Priority, OutboxClosed
+from .shard import owns_chat
+
+# How often progress is persisted and shown to the owner (seconds)
+PROGRESS_INTERVAL = 5
+
+_task = None
+
+
+def broadcast_running() -> bool:
+    return _task is not None and not _task.done()
+
+
+def _format_eta(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m {seconds}s"
+
+
+class Broadcaster:
+    """
+    Sends one broadcast job to every recipient with bounded concurrency. Pacing
+    and FloodWait retries are left to the outbox, where BULK yields to game traffic.
+    """
+
+    def __init__(self, client, job: dict, concurrency: int = BROADCAST_CONCURRENCY):
+        self.client = client
+        self.job = job
+        self.concurrency = concurrency
+        self.queue = asyncio.Queue(maxsize=concurrency * 2)
+
+        self.sent = job.get("sent", 0)
+        self.users = job.get("users", 0)
+        self.failed = job.get("failed", 0)
+        self.cursor = job.get("cursor")
+
+        # Recipients are handed out in ascending id order; the cursor only moves past
+        # an id once every id before it has finished, so a restart never skips anyone.
+        self._finished = {}
+        self._next_seq = 0
+        self._started = monotonic()
+        self._done_at_start = self.done
+        self.stopped = False
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.users + self.failed
+
+    async def _deliver(self, chat_id: int) -> bool:
+        try:
+            if self.job.get("message_id"):
+                await self.client.copy_message(
+                    chat_id, self.job["from_chat_id"], self.job["message_id"], priority=Priority.BULK
+                )
+            else:
+                await self.client.send_message(chat_id, text=self.job["text"], priority=Priority.BULK)
+            return True
+        except OutboxClosed:
+            raise
+        except Exception:
+            return False
+
+    def _complete(self, seq: int, chat_id: int, ok: bool):
+        if not ok:
+            self.failed += 1
+        elif chat_id < 0:
+            self.sent += 1
+        else:
+            self.users += 1
+
+        self._finished[seq] = chat_id
+        while self._next_seq in self._finished:
+            self.cursor = self._finished.pop(self._next_seq)
+            self._next_seq += 1
+
+    async def _worker(self):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            seq, chat_id = item
+            try:
+                ok = await self._deliver(chat_id)
+            except OutboxClosed:
+                # Shutting down: the cursor stays before this recipient, so the resumed job sends it
+                self.stopped = True
+                continue
+            self._complete(seq, chat_id, ok)
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            await self._save_progress()
+
+            elapsed = monotonic() - self._started
+            rate = (self.done - self._done_at_start) / elapsed if elapsed else 0
+            total = self.job.get("total", 0)
+            remaining = max(total - self.done, 0)
+            eta = _format_eta(remaining / rate) if rate else "—"
+            try:
+                await self.client.edit_message_text(
+                    chat_id=self.job["progress_chat_id"],
+                    message_id=self.job["progress_message_id"],
+                    text=(
+                        f"❖ Broadcasting message...\n\n"
+                        f"Progress: {self.done}/{total}\n"
+                        f"Chats: {self.sent} • Users: {self.users} • Failed: {self.failed}\n"
+                        f"Speed: {rate:.1f} msg/s • ETA: {eta}"
+                    )
+                )
+            except Exception:
+                pass
+
+    async def _save_progress(self):
+        try:
+            await update_broadcast(self.cursor, self.sent, self.users, self.failed)
+        except Exception as ex:
+            LOGGER(__name__).error(f"Failed to save broadcast progress: {type(ex).__name__}")
+
+    async def run(self, recipients):
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        reporter = asyncio.create_task(self._report())
+
+        try:
+            # The bounded queue keeps only a few ids in memory however large the stream is
+            seq = 0
+            async for chat_id in recipients:
+                if self.stopped:
+                    break
+                await self.queue.put((seq, chat_id))
+                seq += 1
+
+            for _ in workers:
+                await self.queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            reporter.cancel()
+            for worker in workers:
+                worker.cancel()
+
+        if self.stopped:
+            await self._save_progress()
+            raise OutboxClosed("Broadcast stopped by shutdown")
+
+        await clear_broadcast()
+        try:
+            await self.client.edit_message_text(
+                chat_id=self.job["progress_chat_id"],
+                message_id=self.job["progress_message_id"],
+                text=f"Broadcasted message to {self.sent} chats and {self.users} from the bot. Failed: {self.failed}."
+            )
+        except Exception:
+            pass
+
+
+async def _run_broadcast(client, job: dict):
+    if "total" not in job:
+        job["total"] = await count_recipients()
+        await save_broadcast(job)
+
+    await Broadcaster(client, job).run(iter_recipients(after=job.get("cursor")))
+
+
+def _log_failure(task):
+    if task.cancelled() or not task.exception():
+        return
+    ex = task.exception()
+    if isinstance(ex, OutboxClosed):
+        LOGGER(__name__).info("Broadcast stopped by shutdown; it resumes after the restart.")
+    else:
+        LOGGER(__name__).error(f"Broadcast failed: {type(ex).__name__}: {ex}", exc_info=ex)
+
+
+def start_broadcast(client, job: dict):
+    """Run a broadcast job in the background."""
+    global _task
+    _task = asyncio.create_task(_run_broadcast(client, job))
+    _task.add_done_callback(_log_failure)
+    return _task
+
+
+async def resume_broadcast(client):
+    """Continue a broadcast that was interrupted by a restart."""
+    job = await get_broadcast()
+    # With several workers, the one that owns the owner's progress chat picks it up
+    if job and not broadcast_running() and owns_chat(job["progress_chat_id"]):
+        LOGGER(__name__).info(f"Resuming broadcast after recipient {job.get('cursor')}.")
+        start_broadcast(client, job)
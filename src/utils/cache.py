@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from time import monotonic
+
+_MISSING = object()
+
+
+class _Entry:
+    __slots__ = ("value", "expiry")
+
+    def __init__(self, value, expiry):
+        self.value = value
+        self.expiry = expiry
+
+
+class TTLCache:
+    """Dict-like cache bounded by size, with per-entry TTL and LRU eviction"""
+
+    def __init__(self, maxsize: int, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _lookup(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry.expiry is not None and entry.expiry <= monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return None
+        return entry
+
+    def get(self, key, default=None):
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return entry.value
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        expiry = monotonic() + ttl if ttl is not None else None
+
+        entry = self._data.get(key)
+        if entry is not None:
+            entry.value = value
+            entry.expiry = expiry
+            self._data.move_to_end(key)
+            return
+
+        self._data[key] = _Entry(value, expiry)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._lookup(key)
+        if entry is None:
+            return default
+        del self._data[key]
+        return entry.value
+
+    def purge(self):
+        """Drop every expired entry"""
+        now = monotonic()
+        expired = [key for key, entry in self._data.items() if entry.expiry is not None and entry.expiry <= now]
+        for key in expired:
+            del self._data[key]
+        self.expirations += len(expired)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,20 @@
+# Callback data is "<version>:<route>:<arg>:<arg>...", e.g. "1:pass:3:0a1b2c3d"
+CALLBACK_VERSION = "1"
+SEPARATOR = ":"
+
+
+def callback_data(route: str, *args) -> str:
+    """Encode button data for the callback route `route`"""
+    return SEPARATOR.join((CALLBACK_VERSION, route, *map(str, args)))
+
+
+def parse_callback_data(data: str) -> tuple:
+    """Split button data into (route, args); buttons sent before versioning still parse"""
+    if data.startswith(CALLBACK_VERSION + SEPARATOR):
+        _, route, *args = data.split(SEPARATOR)
+        return route, args
+
+    # Old format: "pass_<card>_<hash>" or the bare route name
+    if data.startswith("pass_"):
+        return "pass", data.split("_")[1:]
+    return data, []
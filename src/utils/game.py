@@ -2,22 +2,61 @@ import random
 import time
 import hashlib
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from config import CARD_ITEMS
+from config import CARD_ITEMS, KEYBOARD_CACHE_SIZE
+from .cache import TTLCache
+from .callbacks import callback_data
+from .hand import Hand
+from .mentions import MentionResolver
+from .player import Player
+
+# Button labels in display order, built once; card ids are CARD_ITEMS indexes
+CARD_LABELS = tuple(f"{item} ×" for item in CARD_ITEMS)
+
+# Rendered keyboards keyed on (hand counts, game hash), shared by every game
+_keyboards = TTLCache(maxsize=KEYBOARD_CACHE_SIZE)
+
+
+def render_card_buttons(counts: bytes, game_hash: str):
+    """Two buttons per row, one per card held, in CARD_ITEMS order"""
+    buttons = []
+    row = []
+    for card_id, count in enumerate(counts):
+        if count:
+            row.append(InlineKeyboardButton(
+                text=f"{CARD_LABELS[card_id]}{count}",
+                callback_data=callback_data("pass", card_id, game_hash)
+            ))
+            if len(row) == 2:
+                buttons.append(row)
+                row = []
+    if row:
+        buttons.append(row)
+    return InlineKeyboardMarkup(buttons) if buttons else None
 
 
 class ChittiGame:
     def __init__(self, host_id: int, chat_id: int):
         self.host = host_id
         self.chat_id = chat_id
-        self.players = []
+        self.players = []           # Player records in join order
+        self._players_by_id = {}    # user_id -> Player
+        self._seats = {}            # user_id -> position in turn_order
         self.started = False
         self.deck = []
         self.player_hands = {}
         self.locked_players = set()
         self.passed_players = set()
         self.turn_order = []
-        self.current_player_index = 0
+        self.current_player_index = 0   # seat of the current player
+        # Doubly-linked ring over the seats of players who haven't locked yet
+        self._next = []
+        self._prev = []
+        self._in_ring = bytearray()
+        self._active = 0
         self.active_button_messages = []
+        self.mentions = MentionResolver()
+        self.on_change = None   # called with the game after every state change
+        self.last_active = time.monotonic()     # last change made by a player, for expiry
         
         # Generate unique hash for this game
         self.game_hash = self._generate_game_hash()
@@ -28,12 +67,34 @@ class ChittiGame:
         chat_data = f"{self.chat_id}_{self.host}_{timestamp}_{random.randint(1000, 9999)}"
         return hashlib.md5(chat_data.encode()).hexdigest()[:8]
 
+    def _touch(self, by_player: bool = True):
+        if by_player:
+            self.last_active = time.monotonic()
+        if self.on_change:
+            self.on_change(self)
+
     def add_player(self, user_id: int, username: str) -> bool:
-        if any(p['id'] == user_id for p in self.players):
+        if user_id in self._players_by_id:
             return False
-        self.players.append({'id': user_id, 'name': username})
+        player = Player(user_id, username)
+        self.players.append(player)
+        self._players_by_id[user_id] = player
+        self._touch()
         return True
 
+    def remove_player(self, user_id: int):
+        player = self._players_by_id.pop(user_id, None)
+        if player:
+            self.players.remove(player)
+            self._touch()
+
+    def get_player(self, user_id: int):
+        return self._players_by_id.get(user_id)
+
+    def seat_of(self, user_id: int):
+        """Position of a player in turn order, or None before the game starts"""
+        return self._seats.get(user_id)
+
     def start_game(self):
         self.started = True
         self.locked_players.clear()
@@ -42,126 +103,188 @@ class ChittiGame:
         self._deal_cards()
         self._set_turn_order()
         self.active_button_messages.clear()
+        self._touch()
 
     def add_button_message(self, message_id, chat_id):
+        # Only the latest prompt per player is kept; older ones are already answered or stale
+        self.active_button_messages = [
+            button for button in self.active_button_messages if button[1] != chat_id
+        ]
         self.active_button_messages.append((message_id, chat_id))
+        self._touch(by_player=False)
 
     def clear_button_messages(self):
         self.active_button_messages.clear()
+        self._touch(by_player=False)
 
     def _create_deck(self):
+        # The deck holds card ids (indexes into CARD_ITEMS)
         N = len(self.players)
         self.deck = []
-        for item in CARD_ITEMS[:N]:
-            self.deck.extend([item] * N)
+        for card_id in range(min(N, len(CARD_ITEMS))):
+            self.deck.extend([card_id] * N)
         random.shuffle(self.deck)
 
     def _deal_cards(self):
         N = len(self.players)
-        for player in self.players:
-            self.player_hands[player['id']] = self.deck[:N]
-            self.deck = self.deck[N:]
+        for i, player in enumerate(self.players):
+            self.player_hands[player.id] = Hand(self.deck[i * N:(i + 1) * N])
+        self.deck = []
 
     def _set_turn_order(self):
-        self.turn_order = [p['id'] for p in self.players]
+        self.turn_order = [p.id for p in self.players]
         random.shuffle(self.turn_order)
+        self._seats = {player_id: i for i, player_id in enumerate(self.turn_order)}
         self.current_player_index = 0
+        self._build_ring()
+
+    def _build_ring(self):
+        N = len(self.turn_order)
+        self._next = [(i + 1) % N for i in range(N)]
+        self._prev = [(i - 1) % N for i in range(N)]
+        self._in_ring = bytearray(N)
+        self._active = 0
+        for seat, player_id in enumerate(self.turn_order):
+            if player_id in self.locked_players:
+                self._unlink(seat)
+            else:
+                self._in_ring[seat] = 1
+                self._active += 1
+
+    def _unlink(self, seat: int):
+        prev, nxt = self._prev[seat], self._next[seat]
+        self._next[prev] = nxt
+        self._prev[nxt] = prev
+        # _next[seat] is left pointing forward so a locked seat can still find its successor
+        if self._in_ring[seat]:
+            self._in_ring[seat] = 0
+            self._active -= 1
+
+    def _lock(self, player_id: int):
+        self.locked_players.add(player_id)
+        seat = self._seats.get(player_id)
+        if seat is not None and self._in_ring[seat]:
+            self._unlink(seat)
+
+    def _active_after(self, seat: int):
+        """First seat still in the ring after `seat` (which may itself be locked)"""
+        if not self._active:
+            return None
+        if self._in_ring[seat]:
+            return self._next[seat]
+
+        # A locked seat points at the seat that followed it when it was removed;
+        # follow those links to the first seat still in play and shorten the path.
+        path = []
+        nxt = self._next[seat]
+        while not self._in_ring[nxt]:
+            path.append(nxt)
+            nxt = self._next[nxt]
+        for passed in path:
+            self._next[passed] = nxt
+        self._next[seat] = nxt
+        return nxt
 
     def _get_next_active_player_id(self, current_id: int) -> int:
-        if current_id not in self.turn_order:
+        seat = self._seats.get(current_id)
+        if seat is None:
             return current_id
-        N = len(self.turn_order)
-        start_index = self.turn_order.index(current_id)
-        for i in range(1, N):
-            next_id = self.turn_order[(start_index + i) % N]
-            if next_id not in self.locked_players:
-                return next_id
-        return current_id
+        nxt = self._active_after(seat)
+        if nxt is None or nxt == seat:
+            return current_id
+        return self.turn_order[nxt]
 
     def get_current_player(self):
-        if not self.turn_order:
+        if not self.turn_order or not self._active:
             return None
-        for _ in range(len(self.turn_order)):
-            player_id = self.turn_order[self.current_player_index]
-            if player_id not in self.locked_players:
-                return next((p for p in self.players if p['id'] == player_id), None)
-            self.current_player_index = (self.current_player_index + 1) % len(self.turn_order)
-        return None
+        if not self._in_ring[self.current_player_index]:
+            self.current_player_index = self._active_after(self.current_player_index)
+        return self._players_by_id.get(self.turn_order[self.current_player_index])
 
     def get_next_player_info(self):
         current = self.get_current_player()
         if not current:
             return None
-        next_id = self._get_next_active_player_id(current['id'])
-        return next((p for p in self.players if p['id'] == next_id), None)
+        next_id = self._get_next_active_player_id(current.id)
+        return self._players_by_id.get(next_id)
 
     def pass_card(self, player_id: int, card_index: int) -> tuple:
         current = self.get_current_player()
-        if not current or player_id != current['id']:
+        if not current or player_id != current.id:
             raise ValueError("Not your turn!")
         if player_id in self.locked_players:
             raise ValueError("You've already won!")
 
-        try:
-            card_type = CARD_ITEMS[card_index]
-        except IndexError:
+        if not 0 <= card_index < len(CARD_ITEMS):
             raise ValueError("Invalid card")
+        card_type = CARD_ITEMS[card_index]
 
         hand = self.player_hands[player_id]
-        if card_type not in hand:
+        if card_index not in hand:
             raise ValueError("You don't have this card")
 
-        hand.remove(card_type)
+        hand.remove(card_index)
 
         next_id = self._get_next_active_player_id(player_id)
         if next_id in self.locked_players:
             raise ValueError("Next player already won!")
 
-        self.player_hands[next_id].append(card_type)
+        self.player_hands[next_id].add(card_index)
         self.passed_players.add(player_id)
 
         self._advance_turn()
+        self._touch()
 
         return card_type, next_id
 
     def get_random_card(self, player_id: int) -> tuple:
-        hand = self.player_hands.get(player_id, [])
+        hand = self.player_hands.get(player_id)
         if not hand:
             return None, None
 
-        card = random.choice(hand)
-        hand.remove(card)
+        card_id = hand.random_card()
+        hand.remove(card_id)
 
         next_id = self._get_next_active_player_id(player_id)
         if next_id in self.locked_players:
             return None, None
 
-        self.player_hands[next_id].append(card)
+        self.player_hands[next_id].add(card_id)
         self.passed_players.add(player_id)
 
         self._advance_turn()
+        self._touch(by_player=False)
 
-        return card, next_id
+        return CARD_ITEMS[card_id], next_id
+
+    def skip_turn(self, player_id: int):
+        """Move the turn past a player with no cards to pass; returns whose turn it is now"""
+        current = self.get_current_player()
+        if not current or current.id != player_id:
+            return None
+        self._advance_turn()
+        self._touch(by_player=False)
+        current = self.get_current_player()
+        return current.id if current else None
 
     def _advance_turn(self):
         if len(self.locked_players) >= len(self.players) - 1:
             return
-        self.current_player_index = (self.current_player_index + 1) % len(self.turn_order)
-        while self.turn_order[self.current_player_index] in self.locked_players:
-            self.current_player_index = (self.current_player_index + 1) % len(self.turn_order)
+        self.current_player_index = self._active_after(self.current_player_index)
 
     def check_win(self, player_id: int) -> bool:
         """Check if player has matching cards and auto-lock them"""
         if player_id in self.locked_players:
             return True
 
-        hand = self.player_hands.get(player_id, [])
+        hand = self.player_hands.get(player_id)
         if not hand:
             return False
 
         # Check if all cards are the same
-        if all(card == hand[0] for card in hand):
-            self.locked_players.add(player_id)
+        if hand.is_set:
+            self._lock(player_id)
+            self._touch()
             # Don't advance turn here - handle it in the main game logic
             return True
         return False
@@ -170,26 +293,16 @@ class ChittiGame:
         if player_id in self.locked_players:
             return None
 
-        hand = self.player_hands.get(player_id, [])
+        hand = self.player_hands.get(player_id)
         if not hand:
             return None
 
-        unique_cards = sorted(set(hand), key=lambda x: CARD_ITEMS.index(x))
-        buttons = []
-        row = []
-
-        for i, card in enumerate(unique_cards):
-            count = hand.count(card)
-            row.append(InlineKeyboardButton(
-                text=f"{card} ×{count}",
-                callback_data=f"pass_{CARD_ITEMS.index(card)}_{self.game_hash}"
-            ))
-
-            if len(row) == 2 or i == len(unique_cards) - 1:
-                buttons.append(row)
-                row = []
-
-        return InlineKeyboardMarkup(buttons) if buttons else None
+        # The same hand is often rendered again (blocked players, /lock, repeated hands)
+        key = (bytes(hand.counts), self.game_hash)
+        markup = _keyboards.get(key)
+        if markup is None:
+            markup = _keyboards[key] = render_card_buttons(*key)
+        return markup
 
     def is_valid_hash(self, provided_hash: str) -> bool:
         """Check if the provided hash matches this game's hash"""
@@ -197,46 +310,70 @@ class ChittiGame:
 
     def distribute_remaining_cards(self, locked_player_id: int):
         """When a player gets locked, distribute their remaining cards to next active players in turn order"""
-        remaining_cards = self.player_hands.get(locked_player_id, [])
+        remaining_cards = self.player_hands.get(locked_player_id)
         if not remaining_cards:
             return []
         
         # Get all active players (not locked)
-        active_players = [p['id'] for p in self.players if p['id'] not in self.locked_players]
+        active_players = [p.id for p in self.players if p.id not in self.locked_players]
         
         if not active_players:
             return []  # No active players left
         
         # Find starting position of the locked player in turn order
-        try:
-            locked_index = self.turn_order.index(locked_player_id)
-        except ValueError:
-            locked_index = 0
+        # Every card goes to the first active player after the locked player
+        # in turn order, or to the first active player if they have no seat
+        locked_seat = self._seats.get(locked_player_id)
+        receiver_seat = self._active_after(locked_seat) if locked_seat is not None else None
+        receiver_id = self.turn_order[receiver_seat] if receiver_seat is not None else active_players[0]
         
+        receiver_hand = self.player_hands[receiver_id]
         distributed_cards = []
-        active_index = 0
-        
-        # Distribute each card to next active players in sequence
-        for card in remaining_cards:
-            # Find next active player starting from locked player's position
-            found_player = False
-            for i in range(len(self.turn_order)):
-                check_index = (locked_index + 1 + i) % len(self.turn_order)
-                potential_player = self.turn_order[check_index]
-                
-                if potential_player not in self.locked_players:
-                    self.player_hands[potential_player].append(card)
-                    distributed_cards.append((card, potential_player))
-                    found_player = True
-                    break
-            
-            # If no player found in turn order, use first active player
-            if not found_player and active_players:
-                receiver_id = active_players[0]
-                self.player_hands[receiver_id].append(card)
-                distributed_cards.append((card, receiver_id))
+        for card_id, count in remaining_cards.items():
+            receiver_hand.add(card_id, count)
+            distributed_cards.extend([(CARD_ITEMS[card_id], receiver_id)] * count)
         
         # Clear the locked player's hand
-        self.player_hands[locked_player_id] = []
+        self.player_hands[locked_player_id] = Hand()
+        self._touch()
         
-        return distributed_cards
\ No newline at end of file
+        return distributed_cards
+
+    def to_snapshot(self) -> dict:
+        """Compact copy of the game state for the games collection"""
+        return {
+            "_id": self.chat_id,
+            "host": self.host,
+            "hash": self.game_hash,
+            "started": self.started,
+            "players": [[p.id, p.name] for p in self.players],
+            # [player id, count vector] for every player that has been dealt a hand
+            "hands": [[p.id, bytes(self.player_hands[p.id].counts)] for p in self.players if p.id in self.player_hands],
+            "turn_order": self.turn_order,
+            "current": self.current_player_index,
+            "locked": list(self.locked_players),
+            "passed": list(self.passed_players),
+            "buttons": [list(button) for button in self.active_button_messages],
+        }
+
+    @classmethod
+    def from_snapshot(cls, doc: dict) -> "ChittiGame":
+        """Rebuild a game saved with to_snapshot()"""
+        game = cls(doc["host"], doc["_id"])
+        game.game_hash = doc["hash"]
+        game.started = doc["started"]
+        for user_id, name in doc["players"]:
+            player = Player(user_id, name)
+            game.players.append(player)
+            game._players_by_id[user_id] = player
+        for user_id, counts in doc["hands"]:
+            if user_id in game._players_by_id:
+                game.player_hands[user_id] = Hand.from_counts(counts)
+        game.locked_players = set(doc["locked"])
+        game.passed_players = set(doc["passed"])
+        game.turn_order = list(doc["turn_order"])
+        game._seats = {player_id: i for i, player_id in enumerate(game.turn_order)}
+        game._build_ring()
+        game.current_player_index = doc["current"]
+        game.active_button_messages = [tuple(button) for button in doc["buttons"]]
+        return game
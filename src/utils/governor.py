@@ -0,0 +1,93 @@
+import asyncio
+import sys
+from time import monotonic
+
+from config import LOBBY_TTL, GAME_TTL, GOVERNOR_INTERVAL
+from src.logging import LOGGER
+from .locks import chat_lock
+from .manager import game_manager
+from .teardown import start_teardown
+
+governor_stats = {"lobbies_expired": 0, "games_expired": 0}
+
+
+def estimate_game_bytes(game) -> int:
+    """Rough size of one game: the object, its containers, players and hands"""
+    size = sys.getsizeof(game) + sys.getsizeof(game.__dict__)
+    for value in game.__dict__.values():
+        size += sys.getsizeof(value)
+    for player in game.players:
+        size += sys.getsizeof(player) + sys.getsizeof(player.name)
+    for hand in game.player_hands.values():
+        size += sys.getsizeof(hand) + sys.getsizeof(hand.counts)
+    return size
+
+
+def game_stats(manager=game_manager) -> dict:
+    games = list(manager.games.values())
+    lobbies = sum(1 for game in games if not game.started)
+    sample = games[:100]
+    per_game = sum(map(estimate_game_bytes, sample)) / len(sample) if sample else 0
+    return {
+        "games": len(games),
+        "lobbies": lobbies,
+        "running": len(games) - lobbies,
+        "max_games": manager.max_games,
+        "players": len(manager.player_chat),
+        "bytes_estimate": int(per_game * len(games)),
+        **governor_stats,
+    }
+
+
+def is_expired(game, now: float = None) -> bool:
+    """Whether a lobby or running game has been idle longer than its TTL"""
+    now = monotonic() if now is None else now
+    return now - game.last_active > (GAME_TTL if game.started else LOBBY_TTL)
+
+
+def expired_games(manager=game_manager, now: float = None) -> list:
+    """(chat_id, started) for lobbies and running games idle longer than their TTL"""
+    now = monotonic() if now is None else now
+    return [(chat_id, game.started) for chat_id, game in manager.games.items() if is_expired(game, now)]
+
+
+async def expire_games(client, manager=game_manager) -> int:
+    """End idle lobbies and abandoned games and tell their groups"""
+    expired = 0
+    for chat_id, started in expired_games(manager):
+        async with chat_lock(chat_id):
+            # A player may have acted while we waited for the lock
+            game = manager.get_game(chat_id)
+            if not game or game.started != started or not is_expired(game):
+                continue
+            ended = monotonic()
+            manager.end_game(chat_id)
+
+        expired += 1
+        if started:
+            governor_stats["games_expired"] += 1
+            text = f"⌛ Game ended after {GAME_TTL // 60} minutes without any moves."
+        else:
+            governor_stats["lobbies_expired"] += 1
+            text = f"⌛ The game lobby closed because it wasn't started within {LOBBY_TTL // 60} minutes."
+        try:
+            await client.send_message(chat_id, text)
+        except Exception:
+            pass
+        if started:
+            # Turn and card buttons of the abandoned game would otherwise stay clickable
+            start_teardown(client, game, ended)
+    return expired
+
+
+async def governor_loop(client):
+    """Expire idle games periodically. Runs for the bot's lifetime."""
+    while True:
+        await asyncio.sleep(GOVERNOR_INTERVAL)
+        try:
+            expired = await expire_games(client)
+        except Exception as ex:
+            LOGGER(__name__).error(f"Game governor failed: {type(ex).__name__}")
+            continue
+        if expired:
+            LOGGER(__name__).info(f"Expired {expired} idle games: {game_stats()}")
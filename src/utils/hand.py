@@ -0,0 +1,83 @@
+import random
+
+from config import CARD_ITEMS
+
+CARD_TYPES = len(CARD_ITEMS)
+
+
+class Hand:
+    """A player's cards stored as a count per card id (index into CARD_ITEMS)"""
+
+    __slots__ = ("counts", "total", "distinct")
+
+    def __init__(self, cards=()):
+        self.counts = bytearray(CARD_TYPES)
+        for card_id in cards:
+            self.counts[card_id] += 1
+        self.total = sum(self.counts)
+        self.distinct = CARD_TYPES - self.counts.count(0)   # card ids held at least once
+
+    @classmethod
+    def from_counts(cls, counts) -> "Hand":
+        """Rebuild a hand from its stored count vector"""
+        hand = cls()
+        hand.counts[:len(counts)] = counts
+        hand.total = sum(hand.counts)
+        hand.distinct = CARD_TYPES - hand.counts.count(0)
+        return hand
+
+    def add(self, card_id: int, count: int = 1):
+        counts = self.counts
+        if not counts[card_id]:
+            self.distinct += 1
+        counts[card_id] += count
+        self.total += count
+
+    def remove(self, card_id: int):
+        counts = self.counts
+        left = counts[card_id] - 1
+        if left < 0:
+            raise ValueError("You don't have this card")
+        counts[card_id] = left
+        self.total -= 1
+        if not left:
+            self.distinct -= 1
+
+    def count(self, card_id: int) -> int:
+        return self.counts[card_id]
+
+    def clear(self):
+        self.counts = bytearray(CARD_TYPES)
+        self.total = 0
+        self.distinct = 0
+
+    @property
+    def is_set(self) -> bool:
+        """True when every card in the hand is the same"""
+        return self.distinct == 1
+
+    def items(self):
+        """(card_id, count) for every card id held, in CARD_ITEMS order"""
+        return [(card_id, count) for card_id, count in enumerate(self.counts) if count]
+
+    def random_card(self, rng=random) -> int:
+        """Pick a card id with the same odds as drawing one card from the hand"""
+        pick = rng.randrange(self.total)
+        for card_id, count in enumerate(self.counts):
+            if pick < count:
+                return card_id
+            pick -= count
+
+    def __contains__(self, card_id) -> bool:
+        return 0 <= card_id < CARD_TYPES and self.counts[card_id] > 0
+
+    def __iter__(self):
+        for card_id, count in enumerate(self.counts):
+            for _ in range(count):
+                yield card_id
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __repr__(self) -> str:
+        return f"Hand({' '.join(f'{CARD_ITEMS[i]}×{c}' for i, c in self.items())})"
@@ -1,33 +1,98 @@
+import asyncio
 from functools import wraps
 from time import time
 from pyrogram.types import Message, InputMediaPhoto
 from pyrogram.errors import UserIsBlocked, PeerIdInvalid, ChatWriteForbidden
 
-# Cache DM availability for 10 minutes
-dm_cache = {}
+from config import DM_OK_TTL, DM_FAIL_TTL, DM_CHECK_CONCURRENCY, DM_CACHE_SIZE, RATE_LIMIT_CACHE_SIZE
+from src.database import get_dm_status, set_dm_status
+from .cache import TTLCache
 
-async def can_send_dm(client, user_id):
-    """Check if bot can message a user with caching"""
-    if user_id in dm_cache and dm_cache[user_id]['expiry'] > time():
-        return dm_cache[user_id]['result']
+# Cache DM availability; negative answers expire sooner than positive ones
+dm_cache = TTLCache(maxsize=DM_CACHE_SIZE)
+_dm_checks = {}             # user_id -> probe task shared by concurrent callers
+_dm_background = set()      # keeps scheduled checks alive until they finish
+_dm_semaphore = asyncio.Semaphore(DM_CHECK_CONCURRENCY)
 
+def _remember_dm(user_id, result, checked_at=None):
+    ttl = DM_OK_TTL if result else DM_FAIL_TTL
+    if checked_at:
+        ttl -= time() - checked_at
+    if ttl > 0:
+        dm_cache.set(user_id, result, ttl=ttl)
+
+async def _persist_dm(user_id, result):
     try:
-        msg = await client.send_message(user_id, "⌛", disable_notification=True)
-        await msg.delete()
-        result = True
-        dm_cache[user_id] = {'result': True, 'expiry': time() + 600}
-    except (UserIsBlocked, PeerIdInvalid, ChatWriteForbidden):
-        result = False
+        await set_dm_status(user_id, result, time())
     except Exception:
-        result = False
+        pass
 
+async def _probe_dm(client, user_id):
+    async with _dm_semaphore:
+        try:
+            msg = await client.send_message(user_id, "⌛", disable_notification=True)
+        except (UserIsBlocked, PeerIdInvalid, ChatWriteForbidden):
+            result = False
+        except Exception:
+            # FloodWait, network trouble or shutdown say nothing about the user: probe again next time
+            return False
+        else:
+            result = True
+            try:
+                await msg.delete()
+            except Exception:
+                pass
+
+    _remember_dm(user_id, result)
+    await _persist_dm(user_id, result)
     return result
 
+async def can_send_dm(client, user_id):
+    """Check if bot can message a user with caching"""
+    cached = dm_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    task = _dm_checks.get(user_id)
+    if task is None:
+        task = asyncio.ensure_future(_probe_dm(client, user_id))
+        _dm_checks[user_id] = task
+        task.add_done_callback(lambda _: _dm_checks.pop(user_id, None))
+    return await asyncio.shield(task)
+
+async def check_dms(client, user_ids):
+    """Check many users at once: memory, then one database query, then parallel probes"""
+    unknown = [uid for uid in user_ids if uid not in _dm_checks and uid not in dm_cache]
+    if unknown:
+        try:
+            stored = await get_dm_status(unknown)
+        except Exception:
+            stored = {}
+        for uid, (result, checked_at) in stored.items():
+            _remember_dm(uid, result, checked_at)
+
+    results = await asyncio.gather(*(can_send_dm(client, uid) for uid in user_ids))
+    return dict(zip(user_ids, results))
+
+def schedule_dm_check(client, user_id):
+    """Start checking a user's DM reachability in the background (e.g. on /join)"""
+    task = asyncio.create_task(check_dms(client, [user_id]))
+    _dm_background.add(task)
+    task.add_done_callback(_dm_background.discard)
+
+async def mark_dm_reachable(user_id):
+    """The user just messaged the bot privately, so DMs to them work"""
+    # Already known and still fresh: nothing new to store
+    if dm_cache.get(user_id) is True:
+        return
+    _remember_dm(user_id, True)
+    await _persist_dm(user_id, True)
+
 def format_player_list(players):
     """Format player list with numbering"""
     if not players:
         return "No players yet"
-    return "\n".join(f"{i+1}. {p['name']}" for i, p in enumerate(players))
+    return "\n".join(f"{i+1}. {p.name}" for i, p in enumerate(players))
 
 def game_required(active=True):
     """Decorator factory to check game status"""
@@ -53,31 +118,21 @@ def game_required(active=True):
         return wrapper
     return decorator
 
-async def cleanup_game_messages(client, game):
-    """Comprehensive game cleanup without media"""
-    caption = "🎉 Game Over! Thanks for playing."
-
-    for player in game.players:
-        try:
-            await client.send_message(player['id'], caption)
-        except Exception:
-            pass
-
 def rate_limit(seconds=2):
     """Prevent command spamming"""
     def decorator(func):
-        last_called = {}
+        # Entries expire after the cooldown, so only recently active users are kept
+        last_called = TTLCache(maxsize=RATE_LIMIT_CACHE_SIZE, ttl=seconds)
 
         @wraps(func)
         async def wrapper(client, message, *args, **kwargs):
             user_id = message.from_user.id
-            now = time()
 
-            if user_id in last_called and (now - last_called[user_id]) < seconds:
+            if user_id in last_called:
                 await message.reply(f"⚠️ Please wait {seconds} seconds between commands")
                 return
 
-            last_called[user_id] = now
+            last_called[user_id] = time()
             return await func(client, message, *args, **kwargs)
         return wrapper
     return decorator
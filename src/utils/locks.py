@@ -0,0 +1,72 @@
+import asyncio
+from contextlib import asynccontextmanager
+from functools import wraps
+
+from pyrogram.enums import ChatType
+from pyrogram.types import CallbackQuery
+
+from src.logging import log_context
+from .manager import game_manager
+
+_chat_locks = {}        # chat_id -> [lock, holders and waiters]
+_inflight = set()       # (user_id, callback data) being handled
+lock_stats = {"waits": 0, "collapsed": 0}
+
+
+@asynccontextmanager
+async def chat_lock(chat_id: int):
+    """Run one update at a time for chat_id; other chats are not blocked"""
+    entry = _chat_locks.get(chat_id)
+    if entry is None:
+        entry = _chat_locks[chat_id] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    if entry[0].locked():
+        lock_stats["waits"] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _chat_locks[chat_id]
+
+
+def game_chat_of(update) -> int:
+    """Chat whose game an update acts on: the group, or the game of the player in a DM"""
+    message = update.message if isinstance(update, CallbackQuery) else update
+    chat = message.chat if message else None
+    if chat is not None and chat.type != ChatType.PRIVATE:
+        return chat.id
+    user_id = update.from_user.id
+    return game_manager.get_player_active_chat(user_id) or user_id
+
+
+def serialized(func):
+    """
+    Handle updates for the same game in arrival order while different games run
+    in parallel, and drop repeated taps on a button that is still being handled.
+    """
+    @wraps(func)
+    async def wrapper(client, update, *args, **kwargs):
+        key = None
+        if isinstance(update, CallbackQuery):
+            key = (update.from_user.id, update.data)
+            if key in _inflight:
+                lock_stats["collapsed"] += 1
+                try:
+                    await update.answer()
+                except Exception:
+                    pass
+                return
+            _inflight.add(key)
+
+        try:
+            chat_id = game_chat_of(update)
+            async with chat_lock(chat_id):
+                game = game_manager.get_game(chat_id)
+                with log_context(chat_id=chat_id, game_hash=game.game_hash if game else None):
+                    return await func(client, update, *args, **kwargs)
+        finally:
+            if key:
+                _inflight.discard(key)
+    return wrapper
@@ -1,11 +1,74 @@
+import asyncio
 import random
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
+from src.logging import LOGGER
+from config import WORKERS, MAX_GAMES
 from .game import ChittiGame          
+from .shard import MongoPlayerRegistry, owns_chat
+from .timer import turn_timers
 
 class GameManager:
     def __init__(self):
         self.games: Dict[int, ChittiGame] = {}        # chat_id -> game
         self.player_chat: Dict[int, int] = {}         # user_id -> chat_id
+        # Chats whose snapshot must be written / deleted by the next checkpoint
+        self.dirty: Set[int] = set()
+        self.ended: Set[int] = set()
+        self.changes = 0                              # state changes seen, for write amplification
+        # Shared player -> chat store when several workers run; None in single-process mode
+        self.registry = None
+        self.max_games = MAX_GAMES
+        self._releases = set()
+
+    def _mark_dirty(self, game: ChittiGame):
+        self.changes += 1
+        self.dirty.add(game.chat_id)
+
+    async def claim_player(self, user_id: int, chat_id: int) -> bool:
+        """Reserve user_id for the game in chat_id across every worker"""
+        if self.registry is None:
+            return True
+        # Our own releases must land first, or a player could not rejoin right after a game
+        if self._releases:
+            await asyncio.gather(*self._releases, return_exceptions=True)
+        return await self.registry.claim(user_id, chat_id)
+
+    def _release(self, chat_id: int, user_ids):
+        if self.registry is None:
+            return
+        task = asyncio.ensure_future(self.registry.release(chat_id, list(user_ids)))
+        self._releases.add(task)
+
+        def _done(task):
+            self._releases.discard(task)
+            if not task.cancelled() and task.exception():
+                LOGGER(__name__).error(f"Failed to release players of {chat_id}: {type(task.exception()).__name__}")
+
+        task.add_done_callback(_done)
+
+    def release_claim(self, chat_id: int, user_id: int):
+        """Give back a claim taken for a game the player didn't end up in"""
+        if self.player_chat.get(user_id) != chat_id:
+            self._release(chat_id, [user_id])
+
+    async def drain_releases(self, timeout: float = None):
+        """Wait for background releases to reach the registry (at shutdown)"""
+        if self._releases:
+            await asyncio.wait(list(self._releases), timeout=timeout)
+
+    async def release_stale_claims(self) -> int:
+        """Release claims for chats this worker owns but has no game in, e.g. left by a crash"""
+        if self.registry is None:
+            return 0
+        stale = [chat_id for chat_id in await self.registry.chats() if owns_chat(chat_id) and chat_id not in self.games]
+        for chat_id in stale:
+            await self.registry.release(chat_id)
+        if stale:
+            LOGGER(__name__).info(f"Released player claims of {len(stale)} chats without a game.")
+        return len(stale)
+
+    def at_capacity(self) -> bool:
+        return len(self.games) >= self.max_games
 
     def create_game(self, host_id: int, chat_id: int) -> ChittiGame:
         # Check if host is already in another active game
@@ -16,10 +79,22 @@ class GameManager:
                 return None  # User already in another group's game
 
         game = ChittiGame(host_id, chat_id)
+        game.on_change = self._mark_dirty
         self.games[chat_id] = game
         self.player_chat[host_id] = chat_id
+        self.ended.discard(chat_id)
+        self._mark_dirty(game)
         return game
 
+    def restore(self, games):
+        """Register games rebuilt from snapshots after a restart"""
+        for game in games:
+            game.on_change = self._mark_dirty
+            self.games[game.chat_id] = game
+            self.player_chat[game.host] = game.chat_id
+            for p in game.players:
+                self.player_chat[p.id] = game.chat_id
+
     def get_game(self, chat_id: int) -> Optional[ChittiGame]:
         return self.games.get(chat_id)
 
@@ -57,19 +132,25 @@ class GameManager:
     def remove_player(self, chat_id: int, user_id: int):
         game = self.games.get(chat_id)
         if game:
-            game.players = [p for p in game.players if p['id'] != user_id]
+            game.remove_player(user_id)
         self.player_chat.pop(user_id, None)
+        self._release(chat_id, [user_id])
 
     def end_game(self, chat_id: int):
         game = self.games.pop(chat_id, None)
         if game:
-            for p in game.players:
-                self.player_chat.pop(p['id'], None)
-
-    def cleanup_inactive_buttons(self, client):
-        """Clean up buttons from ended games"""
-        # This would be called periodically or when games end
-        pass
+            game.on_change = None
+            turn_timers.cancel(chat_id)
+            user_ids = [game.host] + [p.id for p in game.players]
+            # The host is pinned by create_game even if they never joined
+            for user_id in user_ids:
+                if self.player_chat.get(user_id) == chat_id:
+                    del self.player_chat[user_id]
+            self._release(chat_id, user_ids)
+            self.dirty.discard(chat_id)
+            self.ended.add(chat_id)
 
 # single instance used everywhere
-game_manager = GameManager()
\ No newline at end of file
+game_manager = GameManager()
+if WORKERS > 1:
+    game_manager.registry = MongoPlayerRegistry()
\ No newline at end of file
@@ -0,0 +1,59 @@
+import asyncio
+
+
+class MentionResolver:
+    """Per-game cache of player mentions, filled with one batched get_users call"""
+
+    def __init__(self):
+        self.mentions = {}      # user_id -> mention (or name when the lookup failed)
+        self._inflight = {}     # user_id -> lookup task shared by concurrent callers
+
+    async def _fetch(self, client, user_ids):
+        try:
+            users = await client.get_users(user_ids)
+        except Exception:
+            return
+        if not isinstance(users, list):
+            users = [users]
+        for user in users:
+            self.mentions[user.id] = user.mention
+
+    def _start(self, client, user_ids):
+        task = asyncio.ensure_future(self._fetch(client, user_ids))
+        for user_id in user_ids:
+            self._inflight[user_id] = task
+
+        def _done(_):
+            for user_id in user_ids:
+                if self._inflight.get(user_id) is task:
+                    del self._inflight[user_id]
+
+        task.add_done_callback(_done)
+        return task
+
+    async def prefetch(self, client, players):
+        """Resolve every uncached player with a single get_users request"""
+        pending = {self._inflight[p.id] for p in players if p.id in self._inflight}
+        missing = [p.id for p in players if p.id not in self.mentions and p.id not in self._inflight]
+        if missing:
+            pending.add(self._start(client, missing))
+        if pending:
+            await asyncio.shield(asyncio.gather(*pending))
+
+        # Remember failed lookups as plain names so later turns never wait on them
+        for p in players:
+            self.mentions.setdefault(p.id, p.name)
+
+    async def get(self, client, player) -> str:
+        """Mention for a player, looking it up once if it isn't cached yet"""
+        mention = self.mentions.get(player.id)
+        if mention:
+            return mention
+
+        task = self._inflight.get(player.id) or self._start(client, [player.id])
+        await asyncio.shield(task)
+        return self.mentions.setdefault(player.id, player.name)
+
+    def cached(self, player) -> str:
+        """Mention for a player without any network lookup"""
+        return self.mentions.get(player.id, player.name)
@@ -0,0 +1,225 @@
+import asyncio
+import heapq
+from collections import deque
+from contextvars import ContextVar
+from enum import IntEnum
+from time import monotonic
+
+from pyrogram.errors import FloodWait
+
+from config import OUTBOX_RATE, OUTBOX_GROUP_INTERVAL, OUTBOX_PRIVATE_INTERVAL
+from .pacer import TokenBucket
+
+# How many times a request is retried after a FloodWait before the caller sees it
+MAX_FLOOD_RETRIES = 3
+
+
+# True while the outbox runs a request: its FloodWaits must reach _send instead
+# of being slept off inside pyrogram, since the outbox pauses every chat for them
+outbox_call = ContextVar("outbox_call", default=False)
+
+
+class OutboxClosed(RuntimeError):
+    """The outbox stopped (the bot is shutting down) before the request was sent"""
+
+
+class Priority(IntEnum):
+    TURN = 0    # DM prompts and edits in private chats
+    GROUP = 1   # group announcements
+    BULK = 2    # broadcasts
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "call", "future", "enqueued", "retries")
+
+    def __init__(self, priority, seq, call, future):
+        self.priority = priority
+        self.seq = seq
+        self.call = call
+        self.future = future
+        self.enqueued = monotonic()
+        self.retries = 0
+
+
+class Outbox:
+    """
+    Single scheduler for outgoing requests: per-chat FIFO queues paced per chat,
+    a global token bucket shared by every chat, a global pause on FloodWait, and
+    priority classes deciding which chat goes next.
+    """
+
+    def __init__(self, rate: float = OUTBOX_RATE,
+                 group_interval: float = OUTBOX_GROUP_INTERVAL,
+                 private_interval: float = OUTBOX_PRIVATE_INTERVAL):
+        self.bucket = TokenBucket(rate)
+        self.group_interval = group_interval
+        self.private_interval = private_interval
+
+        self._chats = {}          # chat_id -> deque of jobs, head is scheduled
+        self._busy = set()        # chats with a request in flight
+        self._next_allowed = {}   # chat_id -> earliest time of the next request
+        self._ready = []          # heap of (priority, seq, chat_id)
+        self._delayed = []        # heap of (ready_at, seq, chat_id)
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._closed = False
+
+        self.sent = 0
+        self.dispatched = 0
+        self.floodwaits = 0
+        self.flood_seconds = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._closed = False
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0):
+        """
+        Stop taking requests, give queued and in-flight ones `timeout` seconds
+        to go out, then fail whatever is left. Call before the client stops.
+        """
+        self._closed = True
+        if self._task is None:
+            return
+
+        deadline = monotonic() + timeout
+        while (self._chats or self._busy) and monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        for queue in self._chats.values():
+            for job in queue:
+                if not job.future.done():
+                    job.future.set_exception(OutboxClosed("Outbox stopped before the request was sent"))
+        self._chats.clear()
+        self._ready.clear()
+        self._delayed.clear()
+
+    async def submit(self, chat_id, call, priority: Priority = None):
+        """Queue `call` (a zero-argument coroutine function) for chat_id and wait for its result"""
+        if self._closed:
+            raise OutboxClosed("Outbox is stopped")
+        if not self.running:
+            return await call()
+
+        if priority is None:
+            priority = Priority.TURN if isinstance(chat_id, int) and chat_id > 0 else Priority.GROUP
+
+        self._seq += 1
+        job = _Job(priority, self._seq, call, asyncio.get_running_loop().create_future())
+
+        queue = self._chats.get(chat_id)
+        if queue is None:
+            queue = self._chats[chat_id] = deque()
+        queue.append(job)
+        if len(queue) == 1 and chat_id not in self._busy:
+            self._schedule(chat_id)
+
+        return await job.future
+
+    def _schedule(self, chat_id):
+        head = self._chats[chat_id][0]
+        ready_at = self._next_allowed.get(chat_id, 0)
+        if ready_at <= monotonic():
+            self._next_allowed.pop(chat_id, None)
+            heapq.heappush(self._ready, (head.priority, head.seq, chat_id))
+        else:
+            heapq.heappush(self._delayed, (ready_at, head.seq, chat_id))
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, chat_id = heapq.heappop(self._delayed)
+                self._schedule(chat_id)
+
+            if not self._ready:
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.bucket.acquire()
+            _, _, chat_id = heapq.heappop(self._ready)
+            job = self._chats[chat_id].popleft()
+            self._busy.add(chat_id)
+
+            self.dispatched += 1
+            wait = monotonic() - job.enqueued
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            asyncio.create_task(self._send(chat_id, job))
+
+    async def _send(self, chat_id, job: _Job):
+        outbox_call.set(True)   # each _send is its own task, so this stays local to it
+        try:
+            result = await job.call()
+        except FloodWait as fw:
+            self.floodwaits += 1
+            self.flood_seconds += fw.value
+            # Telegram wants a pause: stop every chat, then retry this request first
+            self.bucket.pause(fw.value + 1)
+            if job.retries < MAX_FLOOD_RETRIES and not job.future.done() and not self._closed:
+                job.retries += 1
+                self._chats.setdefault(chat_id, deque()).appendleft(job)
+            elif not job.future.done():
+                job.future.set_exception(fw)
+        except Exception as ex:
+            if not job.future.done():
+                job.future.set_exception(ex)
+        else:
+            self.sent += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._busy.discard(chat_id)
+            interval = self.private_interval if isinstance(chat_id, int) and chat_id > 0 else self.group_interval
+            if interval:
+                self._next_allowed[chat_id] = monotonic() + interval
+
+            if self._chats.get(chat_id):
+                self._schedule(chat_id)
+            else:
+                self._chats.pop(chat_id, None)
+                self._prune()
+
+    def _prune(self):
+        # Forget pacing for idle chats once their interval has passed
+        if len(self._next_allowed) > 10_000:
+            now = monotonic()
+            for chat_id in [c for c, t in self._next_allowed.items() if t <= now]:
+                del self._next_allowed[chat_id]
+
+    def stats(self) -> dict:
+        depth = {priority.name.lower(): 0 for priority in Priority}
+        for queue in self._chats.values():
+            for job in queue:
+                depth[Priority(job.priority).name.lower()] += 1
+        return {
+            "queued": sum(depth.values()),
+            "queued_by_priority": depth,
+            "chats": len(self._chats),
+            "sent": self.sent,
+            "avg_wait": self.total_wait / self.dispatched if self.dispatched else 0.0,
+            "max_wait": self.max_wait,
+            "floodwaits": self.floodwaits,
+            "flood_seconds": self.flood_seconds,
+        }
@@ -0,0 +1,36 @@
+import asyncio
+from time import monotonic
+
+
+class TokenBucket:
+    """Global pacer: allows `rate` operations per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for `seconds` (used when Telegram answers with FloodWait)."""
+        self.paused_until = max(self.paused_until, monotonic() + seconds)
+        self.tokens = 0
+        # Refill starts when the pause ends, so the pause itself earns no burst
+        self.updated = self.paused_until
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
@@ -0,0 +1,65 @@
+import asyncio
+from time import monotonic
+
+from config import SNAPSHOT_DELAY
+from src.database import save_games, load_games
+from src.logging import LOGGER
+from .game import ChittiGame
+from .manager import game_manager
+from .shard import owns_chat
+
+# Snapshot writes, for write-amplification reporting (writes / game_manager.changes)
+snapshot_stats = {"batches": 0, "writes": 0, "deletes": 0}
+
+
+def collect_snapshots(manager=game_manager):
+    """Take the pending snapshots and deletions; each game is written at most once per batch"""
+    dirty, manager.dirty = manager.dirty, set()
+    ended, manager.ended = manager.ended, set()
+    snapshots = [manager.games[chat_id].to_snapshot() for chat_id in dirty if chat_id in manager.games]
+    return snapshots, ended
+
+
+async def checkpoint(manager=game_manager):
+    """Write every changed game now"""
+    snapshots, ended = collect_snapshots(manager)
+    if not snapshots and not ended:
+        return
+
+    try:
+        await save_games(snapshots, ended)
+    except Exception as ex:
+        LOGGER(__name__).error(f"Failed to save game snapshots: {type(ex).__name__}")
+        # Try again with the next batch, unless a newer game replaced the ended one
+        manager.dirty.update(doc["_id"] for doc in snapshots)
+        manager.ended.update(chat_id for chat_id in ended if chat_id not in manager.games)
+        return
+
+    snapshot_stats["batches"] += 1
+    snapshot_stats["writes"] += len(snapshots)
+    snapshot_stats["deletes"] += len(ended)
+
+
+async def snapshot_loop():
+    """Write-behind loop: changes made within SNAPSHOT_DELAY are coalesced into one write per game"""
+    while True:
+        await asyncio.sleep(SNAPSHOT_DELAY)
+        await checkpoint()
+
+
+async def restore_games(manager=game_manager) -> int:
+    """Rebuild the game manager from stored snapshots after a restart"""
+    started = monotonic()
+    games = []
+    for doc in await load_games():
+        # Other workers restore the chats they own
+        if not owns_chat(doc["_id"]):
+            continue
+        try:
+            games.append(ChittiGame.from_snapshot(doc))
+        except Exception as ex:
+            LOGGER(__name__).error(f"Skipping unreadable game snapshot {doc.get('_id')}: {type(ex).__name__}")
+
+    manager.restore(games)
+    LOGGER(__name__).info(f"Restored {len(games)} games in {monotonic() - started:.2f}s.")
+    return len(games)
@@ -0,0 +1,11 @@
+class Player:
+    """A player seated in a ChittiGame"""
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"Player({self.id}, {self.name!r})"
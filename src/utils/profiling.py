@@ -0,0 +1,88 @@
+import asyncio
+import cProfile
+import io
+import pstats
+import tracemalloc
+
+from config import PROFILE_TOP
+
+# Frames kept per allocation while tracemalloc is on
+TRACE_FRAMES = 5
+
+_profile_stop = None     # set to end the running /profile early
+_memory_baseline = None  # snapshot the next /memsnap is compared to
+
+
+def profiling_running() -> bool:
+    return _profile_stop is not None
+
+
+async def profile_for(seconds: float, top: int = PROFILE_TOP) -> str:
+    """Profile the whole event loop for `seconds` (or until stop_profile) and report the top functions"""
+    global _profile_stop
+    if _profile_stop is not None:
+        raise RuntimeError("A profile is already running")
+
+    stop = _profile_stop = asyncio.Event()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.wait_for(stop.wait(), seconds)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        profiler.disable()
+        _profile_stop = None
+
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out).strip_dirs()
+    stats.sort_stats("cumulative").print_stats(top)
+    stats.sort_stats("tottime").print_stats(top)
+    return out.getvalue()
+
+
+def stop_profile() -> bool:
+    if _profile_stop is None:
+        return False
+    _profile_stop.set()
+    return True
+
+
+def _take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+
+def memory_snapshot(top: int = PROFILE_TOP):
+    """
+    Start tracing on the first call (returns None); afterwards report the
+    allocations that grew most since the previous snapshot.
+    """
+    global _memory_baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+        _memory_baseline = _take_snapshot()
+        return None
+
+    snapshot = _take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"Traced memory: {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)", ""]
+    lines += [str(stat) for stat in snapshot.compare_to(_memory_baseline, "lineno")[:top]]
+
+    lines += ["", "Largest allocation sites:", ""]
+    for stat in snapshot.statistics("traceback")[:min(top, 10)]:
+        lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        lines += [f"    {line}" for line in stat.traceback.format()]
+    _memory_baseline = snapshot
+    return "\n".join(lines)
+
+
+def stop_memory_tracing() -> bool:
+    global _memory_baseline
+    if not tracemalloc.is_tracing():
+        return False
+    tracemalloc.stop()
+    _memory_baseline = None
+    return True
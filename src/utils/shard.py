@@ -0,0 +1,58 @@
+import zlib
+from typing import Optional
+
+from config import WORKERS, WORKER_INDEX
+from src.database import claim_player, release_players, get_player_chat, get_claimed_chats
+
+
+def shard_of(chat_id: int, workers: int = WORKERS) -> int:
+    """Worker that owns chat_id; stable across processes and restarts"""
+    if workers <= 1:
+        return 0
+    return zlib.crc32(str(chat_id).encode()) % workers
+
+
+def owns_chat(chat_id: int) -> bool:
+    return shard_of(chat_id) == WORKER_INDEX
+
+
+class LocalPlayerRegistry:
+    """
+    In-memory player -> game chat store. Pass a multiprocessing.Manager().dict()
+    as mapping to share it between processes (benchmarks, tests).
+    """
+
+    def __init__(self, mapping=None):
+        self.mapping = {} if mapping is None else mapping
+
+    async def claim(self, user_id: int, chat_id: int) -> bool:
+        return self.mapping.setdefault(user_id, chat_id) == chat_id
+
+    async def release(self, chat_id: int, user_ids=None):
+        if user_ids is None:
+            user_ids = [user_id for user_id, claimed in list(self.mapping.items()) if claimed == chat_id]
+        for user_id in user_ids:
+            if self.mapping.get(user_id) == chat_id:
+                self.mapping.pop(user_id, None)
+
+    async def chats(self) -> set:
+        return set(self.mapping.values())
+
+    async def lookup(self, user_id: int) -> Optional[int]:
+        return self.mapping.get(user_id)
+
+
+class MongoPlayerRegistry:
+    """Player -> game chat store shared by every worker, backed by the players collection"""
+
+    async def claim(self, user_id: int, chat_id: int) -> bool:
+        return await claim_player(user_id, chat_id)
+
+    async def release(self, chat_id: int, user_ids=None):
+        await release_players(chat_id, user_ids)
+
+    async def chats(self) -> list:
+        return await get_claimed_chats()
+
+    async def lookup(self, user_id: int) -> Optional[int]:
+        return await get_player_chat(user_id)
@@ -0,0 +1,87 @@
+import asyncio
+from collections import Counter
+from functools import partial
+from time import monotonic
+
+from config import TEARDOWN_CONCURRENCY
+from src.logging import LOGGER
+
+BUTTONS_DISABLED = "🎮 Game session ended. Buttons disabled."
+GAME_OVER_DM = "🎉 Game Over! Thanks for playing."
+
+teardown_stats = {
+    "games": 0,
+    "edits": 0,
+    "dms": 0,
+    "failed": 0,
+    "result_seconds": 0.0,   # game end until the group result is posted, summed
+    "total_seconds": 0.0,    # game end until the last edit/DM finished, summed
+    "max_seconds": 0.0,
+}
+teardown_errors = Counter()  # exception name -> failed edits/DMs
+_background = set()          # keeps running teardowns alive until they finish
+
+
+async def fan_out(calls, limit: int = TEARDOWN_CONCURRENCY) -> list:
+    """Run zero-argument coroutine functions with at most `limit` in flight; returns what they raised"""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    results = await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+    return [result for result in results if isinstance(result, Exception)]
+
+
+async def _finish(calls, chat_id, started: float):
+    failures = await fan_out(calls)
+    elapsed = monotonic() - started
+
+    teardown_stats["failed"] += len(failures)
+    teardown_stats["total_seconds"] += elapsed
+    teardown_stats["max_seconds"] = max(teardown_stats["max_seconds"], elapsed)
+    teardown_errors.update(type(ex).__name__ for ex in failures)
+    if failures:
+        summary = ", ".join(f"{name}×{count}" for name, count in Counter(type(ex).__name__ for ex in failures).items())
+        LOGGER(__name__).warning(f"Teardown of {chat_id}: {len(failures)}/{len(calls)} requests failed ({summary})")
+
+
+def start_teardown(client, game, started: float):
+    """Disable the game's buttons and DM every player in the background"""
+    buttons = list(game.active_button_messages)
+    game.clear_button_messages()
+
+    calls = [
+        partial(client.edit_message_text, chat_id=chat_id, message_id=message_id, text=BUTTONS_DISABLED, reply_markup=None)
+        for message_id, chat_id in buttons
+    ]
+    calls += [partial(client.send_message, player.id, GAME_OVER_DM) for player in game.players]
+
+    teardown_stats["games"] += 1
+    teardown_stats["edits"] += len(buttons)
+    teardown_stats["dms"] += len(game.players)
+    teardown_stats["result_seconds"] += monotonic() - started
+
+    task = asyncio.create_task(_finish(calls, game.chat_id, started))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+async def drain_teardowns(timeout: float = None):
+    """Wait for background teardowns to finish (at shutdown)"""
+    if _background:
+        await asyncio.wait(list(_background), timeout=timeout)
+
+
+def teardown_summary() -> dict:
+    games = teardown_stats["games"]
+    finished = games - len(_background)
+    return {
+        **teardown_stats,
+        "running": len(_background),
+        "avg_result_seconds": teardown_stats["result_seconds"] / games if games else 0.0,
+        "avg_seconds": teardown_stats["total_seconds"] / finished if finished else 0.0,
+        "errors": dict(teardown_errors),
+    }
@@ -0,0 +1,125 @@
+import asyncio
+import inspect
+from math import ceil
+
+from src.logging import LOGGER
+
+
+class _Timer:
+    __slots__ = ("key", "due", "callback", "args")
+
+    def __init__(self, key, due, callback, args):
+        self.key = key
+        self.due = due
+        self.callback = callback
+        self.args = args
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel: one tick loop for every timer, O(1) schedule and
+    cancel. Level 0 has one slot per tick; each higher level has one slot per
+    full turn of the level below, and its timers cascade down as their slot
+    comes up. Timers are keyed, so scheduling a key again replaces its timer.
+    """
+
+    def __init__(self, tick: float = 1.0, sizes=(64, 64, 64)):
+        self.tick = tick
+        self.sizes = sizes
+        # Ticks covered by one slot of each level, plus the span of the whole wheel
+        self.spans = [1]
+        for size in sizes:
+            self.spans.append(self.spans[-1] * size)
+        self.levels = [[{} for _ in range(size)] for size in sizes]
+        self.overflow = {}      # timers beyond the wheel's span
+        self.now = 0            # ticks since the wheel started
+        self._where = {}        # key -> slot holding its timer
+        self._running = set()   # callbacks still running
+        self._task = None
+        self.fired = 0
+
+    def __len__(self):
+        return len(self._where)
+
+    def _place(self, timer: _Timer):
+        due = max(timer.due, self.now)
+        for level, size in enumerate(self.sizes):
+            # The lowest level whose current turn still contains the due tick
+            if due // self.spans[level + 1] == self.now // self.spans[level + 1]:
+                slot = self.levels[level][due // self.spans[level] % size]
+                break
+        else:
+            slot = self.overflow
+        slot[timer.key] = timer
+        self._where[timer.key] = slot
+
+    def schedule(self, key, delay: float, callback, *args):
+        """Call callback(*args) after `delay` seconds (rounded up to a tick)"""
+        self.cancel(key)
+        self._place(_Timer(key, self.now + max(1, ceil(delay / self.tick)), callback, args))
+
+    def cancel(self, key):
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            del slot[key]
+
+    def _cascade(self, slot: dict):
+        timers = list(slot.values())
+        slot.clear()
+        for timer in timers:
+            self._place(timer)
+
+    def advance(self):
+        """Move one tick forward and fire the timers that are due"""
+        self.now += 1
+        if self.now % self.spans[-1] == 0:
+            self._cascade(self.overflow)
+        for level in range(len(self.sizes) - 1, 0, -1):
+            if self.now % self.spans[level] == 0:
+                self._cascade(self.levels[level][self.now // self.spans[level] % self.sizes[level]])
+
+        slot = self.levels[0][self.now % self.sizes[0]]
+        due = [timer for timer in slot.values() if timer.due <= self.now]
+        for timer in due:
+            del slot[timer.key]
+            del self._where[timer.key]
+            self._fire(timer)
+
+    def _fire(self, timer: _Timer):
+        self.fired += 1
+        try:
+            result = timer.callback(*timer.args)
+        except Exception as ex:
+            LOGGER(__name__).error(f"Timer {timer.key} failed: {type(ex).__name__}")
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._running.add(task)
+            task.add_done_callback(self._done)
+
+    def _done(self, task):
+        self._running.discard(task)
+        if not task.cancelled() and task.exception():
+            LOGGER(__name__).error(f"Timer callback failed: {type(task.exception()).__name__}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while True:
+            await asyncio.sleep(max(0.0, started + (self.now + 1) * self.tick - loop.time()))
+            # Catch up on ticks missed while the loop was busy
+            while started + (self.now + 1) * self.tick <= loop.time():
+                self.advance()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+# Turn timeouts of every game share this wheel
+turn_timers = TimingWheel()
@@ -0,0 +1,17 @@
+import os
+import sys
+from pathlib import Path
+
+# config.py reads these at import time; the tests never talk to Telegram or Mongo
+for name, value in {
+    "API_ID": "1",
+    "API_HASH": "test",
+    "BOT_TOKEN": "1:test",
+    "OWNER_ID": "1",
+    "LOGGER_ID": "-1",
+    "MONGO_URL": "mongodb://localhost:1",
+    "LOG_FILE": "",
+}.items():
+    os.environ.setdefault(name, value)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
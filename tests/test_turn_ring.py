@@ -0,0 +1,126 @@
+"""
+The active-player ring must pick the same players as the list scan it replaced.
+
+ListScanTurns is the previous turn logic, kept here as the reference: turn order
+is a list, and every lookup walks it skipping locked players.
+"""
+import random
+
+import pytest
+
+from src.utils.game import ChittiGame
+from src.utils.hand import Hand
+
+
+class ListScanTurns:
+    def __init__(self, turn_order):
+        self.turn_order = list(turn_order)
+        self.locked_players = set()
+        self.current_player_index = 0
+
+    def next_active(self, current_id):
+        if current_id not in self.turn_order:
+            return current_id
+        N = len(self.turn_order)
+        start_index = self.turn_order.index(current_id)
+        for i in range(1, N):
+            next_id = self.turn_order[(start_index + i) % N]
+            if next_id not in self.locked_players:
+                return next_id
+        return current_id
+
+    def current(self):
+        for _ in range(len(self.turn_order)):
+            player_id = self.turn_order[self.current_player_index]
+            if player_id not in self.locked_players:
+                return player_id
+            self.current_player_index = (self.current_player_index + 1) % len(self.turn_order)
+        return None
+
+    def advance(self):
+        if len(self.locked_players) >= len(self.turn_order) - 1:
+            return
+        self.current_player_index = (self.current_player_index + 1) % len(self.turn_order)
+        while self.turn_order[self.current_player_index] in self.locked_players:
+            self.current_player_index = (self.current_player_index + 1) % len(self.turn_order)
+
+    def pass_card(self, player_id):
+        if self.current() != player_id:
+            raise ValueError("Not your turn!")
+        next_id = self.next_active(player_id)
+        self.advance()
+        return next_id
+
+    def auto_pass(self, player_id):
+        next_id = self.next_active(player_id)
+        self.advance()
+        return next_id
+
+
+def lobby(rng):
+    """Random joins and leaves; returns the game and the user ids still in it"""
+    game = ChittiGame(host_id=1, chat_id=-100)
+    joined = []
+    for _ in range(rng.randint(2, 25)):
+        user_id = rng.randint(1, 30)
+        if user_id in joined and rng.random() < 0.3:
+            game.remove_player(user_id)
+            joined.remove(user_id)
+        elif game.add_player(user_id, f"user{user_id}"):
+            joined.append(user_id)
+    for user_id in range(100, 102):   # at least two players
+        game.add_player(user_id, f"user{user_id}")
+        joined.append(user_id)
+    return game, joined
+
+
+def assert_same(game, ref):
+    current = game.get_current_player()
+    assert (current.id if current else None) == ref.current()
+    assert game.current_player_index == ref.current_player_index
+    for player_id in ref.turn_order:
+        assert game._get_next_active_player_id(player_id) == ref.next_active(player_id)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_ring_matches_list_scan(seed):
+    rng = random.Random(seed)
+    game, joined = lobby(rng)
+    assert [p.id for p in game.players] == joined
+
+    game.start_game()
+    ref = ListScanTurns(game.turn_order)
+    assert_same(game, ref)
+
+    for _ in range(150):
+        op = rng.random()
+        current = ref.current()
+        if op < 0.45:
+            # The current player passes a card they hold; others are refused
+            player_id = current if current and rng.random() < 0.9 else rng.choice(ref.turn_order)
+            hand = game.player_hands[player_id]
+            if not hand.total:
+                continue
+            card_id = rng.choice([card_id for card_id, _ in hand.items()])
+            try:
+                expected = ref.pass_card(player_id)
+            except ValueError:
+                with pytest.raises(ValueError):
+                    game.pass_card(player_id, card_id)
+                continue
+            _, next_id = game.pass_card(player_id, card_id)
+            assert next_id == expected
+        elif op < 0.6:
+            # Timed out or unreachable: a card is passed for the current player
+            if current is None or not game.player_hands[current].total:
+                continue
+            expected = ref.auto_pass(current)
+            _, next_id = game.get_random_card(current)
+            assert next_id == expected
+        elif op < 0.8:
+            # Someone completes a set and locks, current player or not
+            player_id = rng.choice(ref.turn_order)
+            game.player_hands[player_id] = Hand([0] * len(game.players))
+            assert game.check_win(player_id)
+            ref.locked_players.add(player_id)
+        assert_same(game, ref)